@@ -1,26 +1,31 @@
 import os
 from flask import Flask, request, url_for, session, flash, redirect
-from flask_minify import Minify
-from markupsafe import escape, Markup
 from models.ticket import db
-import re
 from urllib.parse import urlencode
 from config import auth
 from datetime import datetime, timedelta
+from instrumentation import init_instrumentation, instrument_minify, track
+from minify_cache import init_minify
+from template_filters import register_filters
+from fragment_cache import init_fragment_cache
+from database import configure_database
+from authz import init_authz
 
 def create_app():
     app = Flask(__name__)
     app.secret_key = os.getenv('FLASK_SECRET_KEY')
     
-    app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL_DB')
-    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    configure_database(app, db)
     app.config.update(
         SESSION_COOKIE_HTTPONLY=True,
         SESSION_COOKIE_SAMESITE='Lax',
     )
-    db.init_app(app)
     app.jinja_env.add_extension('jinja2.ext.do')
 
+    instrumentation_enabled = os.getenv('APP_INSTRUMENTATION', '').lower() in ('1', 'true', 'yes')
+    if instrumentation_enabled:
+        init_instrumentation(app)
+
     @app.before_request
     def refresh_firebase_token():
         if 'user' in session and 'refreshToken' in session['user'] and 'expires_at' in session['user']:
@@ -29,7 +34,8 @@ def create_app():
             
             if expires_at < datetime.utcnow() + timedelta(minutes=5):
                 try:
-                    user_auth_data = auth.refresh(session['user']['refreshToken'])
+                    with track('external', 'firebase.refresh'):
+                        user_auth_data = auth.refresh(session['user']['refreshToken'])
                     
                     session['user']['idToken'] = user_auth_data['idToken']
                     session['user']['refreshToken'] = user_auth_data['refreshToken']
@@ -45,20 +51,6 @@ def create_app():
                     if request.endpoint and 'login' not in request.endpoint and 'static' not in request.endpoint:
                         return redirect(url_for('auth.login'))
                 
-    def autolink(value):
-        if not value:
-            return ''
-        url_pattern = re.compile(r'((?:https?://|www\.)[^\s<]+[^<.,:;"\'\]\s])')
-        html = url_pattern.sub(r'<a href="\1" target="_blank">\1</a>', escape(value))
-        return Markup(html)
-
-    def nl2br(value):
-        if value is None:
-            return ''
-        linked_text = autolink(value)
-        html = linked_text.replace('\r\n', '\n').replace('\r', '\n').replace('\n', '<br/>')
-        return Markup(html)
-    
     def url_for_with_query(endpoint, **overrides):
         args = request.args.to_dict(flat=False)
         for k, v in overrides.items():
@@ -69,11 +61,15 @@ def create_app():
 
     app.jinja_env.globals['url_for_with_query'] = url_for_with_query
 
-    app.jinja_env.filters['nl2br'] = nl2br
-    app.jinja_env.filters['autolink'] = autolink
+    init_authz(app)
+
+    register_filters(app)
+    init_fragment_cache(app)
 
     if not app.config.get('DEBUG', False):
-        Minify(app=app, html=True, js=True, cssless=True)
+        init_minify(app)
+        if instrumentation_enabled:
+            instrument_minify(app)
 
     from routes.auth import auth_bp
     from routes.main import main_bp
@@ -85,8 +81,8 @@ def create_app():
     app.register_blueprint(admin_bp)
     app.register_blueprint(tickets_bp)
 
-    with app.app_context():
-        db.create_all()
+    from commands import register_commands
+    register_commands(app)
 
     return app
 
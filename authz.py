@@ -0,0 +1,133 @@
+"""Cache de autorização (roles por usuário) no servidor.
+
+As roles eram lidas só do snapshot gravado na sessão no login, então uma
+alteração feita pelo administrador (`update_user_data`) só valia depois de um
+novo login. Aqui as roles de cada uid ficam num cache em memória por
+AUTHZ_CACHE_TTL segundos (padrão 300); ao expirar, os dados do usuário são
+relidos do Firebase uma única vez.
+
+Para a invalidação valer em todos os processos do servidor, cada entrada guarda
+a versão das roles do usuário (`UserAccessVersion`, no banco), lida a cada
+requisição por chave primária, como `Ticket.version` faz com os fragmentos em
+cache. `invalidate(uid)` incrementa essa versão quando o administrador edita o
+usuário, e qualquer processo relê as roles no request seguinte.
+
+A sessão continua guardando `roles` e `codigo_vendedor`, sincronizados a cada
+requisição, para os templates que leem `session.user.roles`.
+"""
+import os
+import time
+from collections import namedtuple
+from flask import session, g
+from sqlalchemy import select, update, insert
+from sqlalchemy.exc import IntegrityError
+from cache import LRUCache
+from models.ticket import db
+from models.access import UserAccessVersion
+
+AUTHZ_CACHE_TTL = int(os.getenv('AUTHZ_CACHE_TTL', 300))
+
+UserAccess = namedtuple('UserAccess', ['roles', 'codigo_vendedor', 'expires_at', 'version'])
+
+_access = LRUCache(maxsize=int(os.getenv('AUTHZ_CACHE_SIZE', 4096)))
+
+
+def _shared_version(uid):
+    return db.session.execute(
+        select(UserAccessVersion.version).where(UserAccessVersion.uid == uid)
+    ).scalar() or 0
+
+
+def _fetch_access(user, previous, version):
+    from models.user import fetch_user_data
+    expires_at = time.monotonic() + AUTHZ_CACHE_TTL
+    try:
+        user_data = fetch_user_data(user['uid'], user.get('idToken'))
+    except Exception as e:
+        # Falha na leitura: mantém o último valor conhecido e tenta de novo depois do TTL
+        print(f"Erro ao buscar as roles do usuário {user['uid']}: {e}")
+        if previous is not None:
+            return previous._replace(expires_at=expires_at, version=version)
+        return UserAccess(frozenset(user.get('roles') or {}), user.get('codigo_vendedor', ''), expires_at, version)
+    if user_data is None:
+        # Registro removido: nenhuma role
+        return UserAccess(frozenset(), '', expires_at, version)
+    return UserAccess(frozenset(user_data.get('roles') or {}), user_data.get('codigo_vendedor', ''),
+                      expires_at, version)
+
+
+def get_access(user=None):
+    """Roles e código de vendedor atuais do usuário logado (None se não houver login)."""
+    if user is None:
+        if 'authz_access' in g:
+            return g.authz_access
+        user = session.get('user')
+    if not user or 'uid' not in user:
+        return None
+
+    version = _shared_version(user['uid'])
+    access = _access.get(user['uid'])
+    if access is None or access.expires_at <= time.monotonic() or access.version != version:
+        access = _fetch_access(user, access, version)
+        _access.set(user['uid'], access)
+    return access
+
+
+def current_roles():
+    access = get_access()
+    return access.roles if access else frozenset()
+
+
+def has_any_role(*roles):
+    user_roles = current_roles()
+    return any(role in user_roles for role in roles)
+
+
+def is_admin():
+    return 'admin' in current_roles()
+
+
+def remember(uid, user_data):
+    """Guarda os dados lidos no login, evitando uma nova leitura na primeira requisição."""
+    user_data = user_data or {}
+    _access.set(uid, UserAccess(frozenset(user_data.get('roles') or {}), user_data.get('codigo_vendedor', ''),
+                                time.monotonic() + AUTHZ_CACHE_TTL, _shared_version(uid)))
+
+
+def invalidate(uid):
+    """Descarta as roles em cache de um usuário em todos os processos (o administrador o editou).
+
+    A versão é gravada numa transação própria, independente da sessão do request.
+    """
+    _access.delete(uid)
+    for _ in range(2):
+        try:
+            with db.engine.begin() as connection:
+                updated = connection.execute(
+                    update(UserAccessVersion).where(UserAccessVersion.uid == uid)
+                    .values(version=UserAccessVersion.version + 1)
+                ).rowcount
+                if not updated:
+                    connection.execute(insert(UserAccessVersion).values(uid=uid, version=1))
+            return
+        except IntegrityError:
+            continue  # outro processo inseriu a linha ao mesmo tempo; incrementa a existente
+
+
+def init_authz(app):
+    """Sincroniza as roles da sessão com o cache no início de cada requisição."""
+
+    @app.before_request
+    def sync_session_access():
+        user = session.get('user')
+        if not user:
+            return
+        access = get_access(user)
+        if access is None:
+            return
+        g.authz_access = access
+        roles = {role: True for role in access.roles}
+        if user.get('roles') != roles or user.get('codigo_vendedor', '') != access.codigo_vendedor:
+            user['roles'] = roles
+            user['codigo_vendedor'] = access.codigo_vendedor
+            session.modified = True
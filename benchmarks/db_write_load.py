@@ -0,0 +1,126 @@
+"""Teste de carga de escrita concorrente no banco: várias threads chamando
+`ticket_service.add_interaction` e `ticket_service.create_ticket` ao mesmo tempo.
+Reporta vazão, latências e quantos erros de lock ("database is locked", deadlocks,
+timeouts de lock) ocorreram.
+
+Uso: python benchmarks/db_write_load.py [--threads 8] [--ops 200] [--create-ratio 0.1]
+                                         [--database-url sqlite:////tmp/carga.db] [--baseline]
+
+Sem --database-url, usa um arquivo SQLite temporário. --baseline desliga o perfil
+de database.py (DATABASE_TUNING=0) para comparação.
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import threading
+import statistics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+LOCK_ERROR_MARKERS = ('database is locked', 'deadlock', 'lock wait timeout', 'could not obtain lock')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--ops', type=int, default=200, help='operações por thread')
+    parser.add_argument('--create-ratio', type=float, default=0.1, help='fração de create_ticket')
+    parser.add_argument('--seed-tickets', type=int, default=50)
+    parser.add_argument('--database-url')
+    parser.add_argument('--baseline', action='store_true')
+    return parser.parse_args()
+
+
+def worker(app, ticket_ids, args, seed, results):
+    from services import ticket_service
+    from models.ticket import db
+
+    rng = random.Random(seed)
+    latencies, lock_errors, other_errors = [], 0, []
+    with app.app_context():
+        for i in range(args.ops):
+            start = time.perf_counter()
+            try:
+                if rng.random() < args.create_ratio:
+                    ticket = ticket_service.create_ticket(
+                        f'Carga {seed}-{i}', 'Média', 'TI', 'Chamado gerado pelo teste de carga',
+                        f'carga{seed}@empresa.com'
+                    )
+                    ticket_ids.append(ticket.id)
+                else:
+                    ticket_service.add_interaction(
+                        rng.choice(ticket_ids), f'carga{seed}@empresa.com', 'comment',
+                        text=f'Interação {i} da thread {seed}'
+                    )
+                latencies.append(time.perf_counter() - start)
+            except Exception as e:
+                db.session.rollback()
+                if any(marker in str(e).lower() for marker in LOCK_ERROR_MARKERS):
+                    lock_errors += 1
+                else:
+                    other_errors.append(repr(e)[:200])
+    results.append((latencies, lock_errors, other_errors))
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def main():
+    args = parse_args()
+    database_url = args.database_url
+    if not database_url:
+        database_url = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='carga_'), 'carga.db')}"
+    os.environ['DATABASE_URL_DB'] = database_url
+    os.environ.setdefault('FLASK_SECRET_KEY', 'benchmark')
+    if args.baseline:
+        os.environ['DATABASE_TUNING'] = '0'
+
+    from app import create_app
+    from schema import create_schema
+    from services import ticket_service
+
+    app = create_app()
+    with app.app_context():
+        create_schema()
+        ticket_ids = [
+            ticket_service.create_ticket(f'Base {n}', 'Baixa', 'TI', 'Chamado base', 'base@empresa.com').id
+            for n in range(args.seed_tickets)
+        ]
+
+    results = []
+    threads = [threading.Thread(target=worker, args=(app, ticket_ids, args, n, results))
+               for n in range(args.threads)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies = [latency for r in results for latency in r[0]]
+    lock_errors = sum(r[1] for r in results)
+    other_errors = [error for r in results for error in r[2]]
+    total = args.threads * args.ops
+
+    print(f'Banco: {database_url}  perfil: {"padrão SQLAlchemy" if args.baseline else "database.py"}')
+    print(f'{args.threads} threads x {args.ops} operações ({args.create_ratio:.0%} create_ticket)')
+    print(f'Concluídas: {len(latencies)}/{total} em {elapsed:.2f} s  ->  {len(latencies) / elapsed:.1f} escritas/s')
+    if latencies:
+        print(f'Latência: mediana {statistics.median(latencies) * 1000:.1f} ms   '
+              f'p95 {percentile(latencies, 95) * 1000:.1f} ms   p99 {percentile(latencies, 99) * 1000:.1f} ms   '
+              f'máx {max(latencies) * 1000:.1f} ms')
+    print(f'Erros de lock: {lock_errors}   outros erros: {len(other_errors)}')
+    for error in sorted(set(other_errors))[:5]:
+        print(f'  {error}')
+
+
+if __name__ == '__main__':
+    main()
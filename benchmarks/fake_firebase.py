@@ -0,0 +1,199 @@
+"""Servidor HTTP local que imita os endpoints do Firebase usados pela aplicação.
+
+Atende o login (`accounts:signInWithPassword`), o cadastro (`accounts:signUp`),
+a renovação de token e leituras/escritas do Realtime Database (`/<caminho>.json`
+com GET, PUT, PATCH e DELETE). Para usá-lo, aponte FIREBASE_AUTH_URL,
+FIREBASE_TOKEN_URL e FIREBASE_DATABASE_URL para `server.auth_url`,
+`server.token_url` e `server.database_url` antes de importar a aplicação.
+
+`latency` adiciona um atraso fixo (em segundos) a cada resposta, para simular a
+ida e volta até o Google.
+"""
+import json
+import time
+import uuid
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs, unquote
+
+
+class FakeFirebase:
+    def __init__(self, users=None, latency=0.0, host='127.0.0.1', port=0):
+        """`users`: {email: {'password': ..., 'roles': [...], outros campos do perfil}}."""
+        self.latency = latency
+        self.data = {'users': {}}
+        self.accounts = {}
+        self.tokens = {}
+        self.request_count = 0
+        self._lock = threading.Lock()
+        for email, profile in (users or {}).items():
+            self.add_user(email, **profile)
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    @property
+    def auth_url(self):
+        return f'{self.base_url}/auth/v1'
+
+    @property
+    def token_url(self):
+        return f'{self.base_url}/token'
+
+    @property
+    def database_url(self):
+        return f'{self.base_url}/db'
+
+    def add_user(self, email, password='senha123', roles=('admin',), **profile):
+        uid = uuid.uuid4().hex[:28]
+        with self._lock:
+            self.accounts[email] = {'uid': uid, 'password': password}
+            self.data['users'][uid] = dict(profile, email=email, roles={role: True for role in roles})
+        return uid
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name='fake-firebase', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # --- Estado -------------------------------------------------------------
+
+    def _issue_tokens(self, uid):
+        id_token, refresh_token = uuid.uuid4().hex, uuid.uuid4().hex
+        self.tokens[refresh_token] = uid
+        return id_token, refresh_token
+
+    def _node(self, path, create=False):
+        node = self.data
+        for segment in path:
+            if not isinstance(node, dict):
+                return None
+            if segment not in node:
+                if not create:
+                    return None
+                node[segment] = {}
+            node = node[segment]
+        return node
+
+    def _write(self, path, value, merge=False):
+        if not path:
+            if merge:
+                self.data.update(value)
+            else:
+                self.data = value
+            return
+        parent = self._node(path[:-1], create=True)
+        if merge and isinstance(parent.get(path[-1]), dict):
+            parent[path[-1]].update(value)
+        elif value is None:
+            parent.pop(path[-1], None)
+        else:
+            parent[path[-1]] = value
+
+    # --- HTTP ----------------------------------------------------------------
+
+    def _handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status, payload):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _body(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                raw = self.rfile.read(length) if length else b''
+                if self.headers.get('Content-Type', '').startswith('application/x-www-form-urlencoded'):
+                    return {k: v[0] for k, v in parse_qs(raw.decode()).items()}
+                return json.loads(raw) if raw else None
+
+            def _dispatch(self, method):
+                with fake._lock:
+                    fake.request_count += 1
+                if fake.latency:
+                    time.sleep(fake.latency)
+                url = urlparse(self.path)
+                body = self._body() if method in ('POST', 'PUT', 'PATCH') else None
+                with fake._lock:
+                    if url.path.startswith('/auth/v1/accounts:'):
+                        return self._accounts(url.path.rsplit(':', 1)[1], body)
+                    if url.path == '/token':
+                        return self._refresh(body)
+                    if url.path.startswith('/db/') and url.path.endswith('.json'):
+                        return self._database(method, url.path[len('/db/'):-len('.json')], body)
+                self._send(404, {'error': {'message': 'NOT_FOUND'}})
+
+            def _accounts(self, action, body):
+                email, password = body.get('email'), body.get('password')
+                account = fake.accounts.get(email)
+                if action == 'signInWithPassword':
+                    if not account or account['password'] != password:
+                        return self._send(400, {'error': {'message': 'INVALID_LOGIN_CREDENTIALS'}})
+                elif action == 'signUp':
+                    if account:
+                        return self._send(400, {'error': {'message': 'EMAIL_EXISTS'}})
+                    account = fake.accounts[email] = {'uid': uuid.uuid4().hex[:28], 'password': password}
+                else:
+                    return self._send(404, {'error': {'message': 'NOT_FOUND'}})
+                id_token, refresh_token = fake._issue_tokens(account['uid'])
+                self._send(200, {'localId': account['uid'], 'email': email, 'idToken': id_token,
+                                 'refreshToken': refresh_token, 'expiresIn': '3600'})
+
+            def _refresh(self, body):
+                uid = fake.tokens.pop((body or {}).get('refresh_token'), None)
+                if uid is None:
+                    return self._send(400, {'error': {'message': 'INVALID_REFRESH_TOKEN'}})
+                id_token, refresh_token = fake._issue_tokens(uid)
+                self._send(200, {'user_id': uid, 'id_token': id_token, 'refresh_token': refresh_token,
+                                 'expires_in': '3600'})
+
+            def _database(self, method, path, body):
+                path = [unquote(segment) for segment in path.split('/') if segment]
+                if method == 'GET':
+                    return self._send(200, fake._node(path))
+                if method == 'DELETE':
+                    fake._write(path, None)
+                    return self._send(200, None)
+                fake._write(path, body, merge=method == 'PATCH')
+                self._send(200, body)
+
+            def do_GET(self):
+                self._dispatch('GET')
+
+            def do_POST(self):
+                self._dispatch('POST')
+
+            def do_PUT(self):
+                self._dispatch('PUT')
+
+            def do_PATCH(self):
+                self._dispatch('PATCH')
+
+            def do_DELETE(self):
+                self._dispatch('DELETE')
+
+        return Handler
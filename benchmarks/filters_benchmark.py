@@ -0,0 +1,82 @@
+"""Micro-benchmark dos filtros `autolink` e `nl2br`: implementação antiga (regex
+compilada a cada chamada e três `replace`) contra a de template_filters, com o
+cache frio (primeira visualização) e quente (visualizações seguintes).
+
+Uso: python benchmarks/filters_benchmark.py [--interactions 500] [--views 20]
+"""
+import os
+import re
+import sys
+import time
+import random
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from markupsafe import escape, Markup
+import template_filters
+
+
+def baseline_autolink(value):
+    if not value:
+        return ''
+    url_pattern = re.compile(r'((?:https?://|www\.)[^\s<]+[^<.,:;"\'\]\s])')
+    html = url_pattern.sub(r'<a href="\1" target="_blank">\1</a>', escape(value))
+    return Markup(html)
+
+
+def baseline_nl2br(value):
+    if value is None:
+        return ''
+    linked_text = baseline_autolink(value)
+    html = linked_text.replace('\r\n', '\n').replace('\r', '\n').replace('\n', '<br/>')
+    return Markup(html)
+
+
+def build_texts(count, seed=42):
+    rng = random.Random(seed)
+    words = ['chamado', 'ajuste', 'relatório', 'cliente', 'pedido', 'nota', 'fiscal', 'erro', 'validação',
+             'etapa', 'prazo', '<script>', '&', 'consulta']
+    texts = []
+    for i in range(count):
+        lines = []
+        for _ in range(rng.randint(1, 12)):
+            line = ' '.join(rng.choice(words) for _ in range(rng.randint(4, 25)))
+            if rng.random() < 0.3:
+                line += f' https://intranet.empresa.com/docs/{i}?ref=chamado.'
+            if rng.random() < 0.1:
+                line += f' www.fornecedor{i}.com.br'
+            lines.append(line)
+        texts.append(rng.choice(['\n', '\r\n']).join(lines))
+    return texts
+
+
+def run(label, texts, views, nl2br, autolink):
+    start = time.perf_counter()
+    for _ in range(views):
+        for text in texts:
+            nl2br(text)
+            autolink(text[:40])
+    elapsed = time.perf_counter() - start
+    print(f'{label:<32} {elapsed / views * 1000:8.2f} ms/visualização')
+    return elapsed / views
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--interactions', type=int, default=500)
+    parser.add_argument('--views', type=int, default=20)
+    args = parser.parse_args()
+
+    texts = build_texts(args.interactions)
+
+    before = run('regex por chamada (antes)', texts, args.views, baseline_nl2br, baseline_autolink)
+    cold = run('template_filters, cache frio', texts, 1, template_filters.nl2br, template_filters.autolink)
+    warm = run('template_filters, cache quente', texts, args.views, template_filters.nl2br, template_filters.autolink)
+    print(f'Ganho com cache quente: {before / warm:.1f}x  (frio: {before / cold:.1f}x; '
+          f'acertos: {template_filters._rendered.hits}, falhas: {template_filters._rendered.misses})')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+"""Dados sintéticos para os benchmarks: banco de chamados semeado e arquivos
+Parquet de vendas com as colunas lidas pelos painéis comerciais.
+
+Tudo é gerado a partir de uma semente, então duas execuções com os mesmos
+parâmetros produzem exatamente os mesmos dados.
+"""
+import os
+import random
+from datetime import datetime, timedelta
+
+STATUSES = ['Aberto', 'Em Andamento', 'Aguardando Resposta', 'Fechado']
+URGENCIES = ['Baixa', 'Média', 'Alta', 'Crítica']
+SECTORS = ['TI', 'Financeiro', 'Comercial', 'RH', 'Operacional']
+WORDS = ['chamado', 'ajuste', 'relatório', 'cliente', 'pedido', 'nota', 'fiscal', 'erro', 'validação',
+         'etapa', 'prazo', 'consulta', 'acesso', 'sistema', 'impressora', 'boleto']
+
+SALES_TYPES = [('NOTA FISCAL DE SAÍDA', 0.8), ('DEVOLUÇÃO', 0.08), ('CANCELAMENTO', 0.07), ('ANULAÇÃO', 0.05)]
+LINE_DOC_TYPES = ['OFERTA DE VENDA', 'PEDIDO DE VENDA', 'NOTA FISCAL DE SAÍDA']
+
+
+def _text(rng, min_words=5, max_words=40):
+    words = [rng.choice(WORDS) for _ in range(rng.randint(min_words, max_words))]
+    if rng.random() < 0.2:
+        words.append(f'https://intranet.empresa.com/docs/{rng.randint(1, 9999)}')
+    return ' '.join(words)
+
+
+def seed_database(app, tickets=500, interactions_per_ticket=10, attachment_ratio=0.1,
+                  user_emails=('usuario@empresa.com',), admin_email='admin@empresa.com', seed=42):
+    """Cria chamados, interações e anexos com inserts em lote e recalcula os resumos
+    de SLA e dos chamados.
+
+    Os arquivos de anexo (pequenos) são gravados em ticket_service.UPLOAD_FOLDER,
+    relativo ao diretório atual. Retorna a lista de ids dos chamados criados.
+    """
+    from sqlalchemy import insert, select, func
+    from models.ticket import db, Ticket, Interaction, Attachment
+    from services import ticket_service, sla_service, ticket_summary
+    from schema import create_schema
+
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    os.makedirs(ticket_service.UPLOAD_FOLDER, exist_ok=True)
+
+    with app.app_context():
+        create_schema()
+        first_id = (db.session.execute(select(func.max(Ticket.id))).scalar() or 0) + 1
+        ticket_rows = []
+        for n in range(tickets):
+            created_at = now - timedelta(days=rng.uniform(0, 365))
+            ticket_rows.append({
+                'id': first_id + n,
+                'title': f'{rng.choice(WORDS).capitalize()} {rng.choice(WORDS)} #{n}',
+                'urgency': rng.choice(URGENCIES),
+                'sector': rng.choice(SECTORS),
+                'description': _text(rng, 20, 120),
+                'user_email': rng.choice(user_emails),
+                'status': rng.choice(STATUSES),
+                'created_at': created_at,
+                'assigned_user_email': admin_email if rng.random() < 0.6 else None,
+                'ticket_type': 'chamado',
+                'version': 1,
+            })
+        db.session.execute(insert(Ticket), ticket_rows)
+
+        interaction_rows, attachment_rows = [], []
+        for ticket in ticket_rows:
+            timestamp = ticket['created_at']
+            for i in range(interactions_per_ticket):
+                timestamp += timedelta(minutes=rng.uniform(5, 600))
+                author = admin_email if i % 2 == 0 else ticket['user_email']
+                interaction_rows.append({
+                    'ticket_id': ticket['id'],
+                    'user_email': author,
+                    'timestamp': timestamp,
+                    'action_type': 'comment',
+                    'text': _text(rng),
+                    'interaction_data': {},
+                })
+        db.session.execute(insert(Interaction), interaction_rows)
+        db.session.commit()
+
+        interactions = db.session.execute(
+            select(Interaction.id, Interaction.ticket_id).where(Interaction.ticket_id >= first_id)
+        ).all()
+        for interaction_id, ticket_id in interactions:
+            if rng.random() < attachment_ratio:
+                filename = f'{ticket_id}_interaction_{interaction_id}_bench.pdf'
+                filepath = os.path.join(ticket_service.UPLOAD_FOLDER, filename)
+                with open(filepath, 'wb') as f:
+                    f.write(os.urandom(rng.randint(2_000, 50_000)))
+                attachment_rows.append({'ticket_id': ticket_id, 'interaction_id': interaction_id,
+                                        'filepath': filepath, 'filename': 'documento.pdf'})
+        if attachment_rows:
+            db.session.execute(insert(Attachment), attachment_rows)
+        db.session.commit()
+        sla_service.rebuild_sla_summaries()
+        ticket_summary.repair_summaries()
+
+    return [row['id'] for row in ticket_rows]
+
+
+def write_sales_parquet(head_path, line_path, days=180, docs_per_day=200, lines_per_doc=4,
+                        sellers=20, end_date=None, seed=42):
+    """Gera os arquivos de cabeçalho e de linhas de venda (PARQUET_ANALISE_VENDA_HEAD/_LINE).
+
+    O cabeçalho tem as colunas usadas por commercial_service e goals_service; as
+    linhas, as usadas no desconto médio e no funil de conversão.
+    """
+    import numpy as np
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    rng = np.random.default_rng(seed)
+    end_date = end_date or datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    docs = days * docs_per_day
+
+    dates = np.repeat(np.array([end_date - timedelta(days=d) for d in range(days)], dtype='datetime64[us]'),
+                      docs_per_day)
+    types, weights = zip(*SALES_TYPES)
+    seller_codes = rng.integers(1, sellers + 1, size=docs)
+    lcto = np.arange(1, docs + 1, dtype=np.int64)
+    value = np.round(rng.gamma(2.0, 2500.0, size=docs), 2)
+
+    head = pa.table({
+        'Data': dates,
+        'TipoNs': rng.choice(types, size=docs, p=weights),
+        'ValorTotal': value,
+        'PesoTotal': np.round(rng.gamma(2.0, 150.0, size=docs), 2),
+        'DocNum': np.arange(100000, 100000 + docs, dtype=np.int64),
+        'LctoContabil': lcto,
+        'CodigoVendedor': seller_codes.astype(str),
+        'NomeVendedor': np.char.add('Vendedor ', seller_codes.astype(str)),
+    })
+    pq.write_table(head, head_path, row_group_size=65536)
+
+    line_count = docs * lines_per_doc
+    gross = np.round(rng.gamma(2.0, 700.0, size=line_count), 2)
+    line = pa.table({
+        'LctoContabil': np.repeat(lcto, lines_per_doc),
+        'Data': np.repeat(dates, lines_per_doc),
+        'DocNum': np.repeat(head['DocNum'].to_numpy(), lines_per_doc),
+        'TipoDoc': rng.choice(LINE_DOC_TYPES, size=line_count),
+        'CodigoVendedor': np.repeat(seller_codes.astype(str), lines_per_doc),
+        'TotalBruto': gross,
+        'TotalLinha': np.round(gross * rng.uniform(0.85, 1.0, size=line_count), 2),
+    })
+    pq.write_table(line, line_path, row_group_size=65536)
+    return head.num_rows, line.num_rows
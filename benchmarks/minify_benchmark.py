@@ -0,0 +1,180 @@
+"""Compara o custo de CPU por resposta da minificação antiga (htmlmin + jsmin a cada
+request, como o flask_minify fazia) com o MinifyCache.
+
+O cenário de descarte simula muitas páginas distintas (`--templates`), cada uma
+com scripts e estilos próprios, servidas com HTML dinâmico diferente a cada
+request, e mostra a taxa de acerto dos scripts/estilos no LRU. Para comparação,
+roda também uma variante que guarda no mesmo LRU os trechos de HTML dinâmico
+(chaves que nunca se repetem e empurram os scripts para fora do cache).
+
+O htmlmin não é mais dependência do projeto; sem ele instalado
+(`pip install htmlmin`), a medição "antes" é pulada e só o MinifyCache é medido.
+
+Uso: python benchmarks/minify_benchmark.py [--requests 200] [--rows 300]
+                                            [--templates 100] [--block-cache-size 512]
+"""
+import os
+import re
+import sys
+import time
+import argparse
+import json
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+try:
+    from htmlmin import minify as minify_html
+except ImportError:
+    minify_html = None
+from jsmin import jsmin
+from minify_cache import MinifyCache
+
+
+def _template_script(path):
+    """Extrai o script inline de um template (sem as tags Jinja)."""
+    with open(os.path.join(ROOT, path), encoding='utf-8') as f:
+        source = f.read()
+    scripts = re.findall(r'<script>(.*?)</script>', source, re.DOTALL)
+    return re.sub(r'{[{%].*?[%}]}', '', scripts[0])
+
+
+def build_page(request_number, rows, chart_script):
+    chart_data = {'labels': [f'{d:02d}/08' for d in range(1, 31)],
+                  'faturamento_data': [request_number * 1000 + d for d in range(30)]}
+    items = []
+    for i in range(rows):
+        items.append(f"""
+            <div class="ticket-item" data-href="/tickets/{i}">
+                <div class="ticket-main-line">
+                    <h4 class="ticket-title" title="Chamado {i}">
+                        📁
+                        #{i} - Chamado {i} (request {request_number})
+                    </h4>
+                    <span class="urgency-badge urgency-alta">Alta</span>
+                </div>
+                <div class="ticket-meta-line">
+                    <span>Criado por: <strong>user{i}@empresa.com</strong></span>
+                    <span>&bull;</span>
+                    <span>Status: <strong>Aberto</strong></span>
+                </div>
+            </div>""")
+    return f"""<!DOCTYPE html>
+<html lang="pt-BR">
+<head>
+    <meta charset="UTF-8">
+    <title>Benchmark</title>
+    <!-- comentário do layout -->
+</head>
+<body>
+    <main class="container">
+        {''.join(items)}
+    </main>
+    <script id="chart-data" type="application/json">{json.dumps(chart_data)}</script>
+    <script>{chart_script}</script>
+</body>
+</html>"""
+
+
+def build_template_page(request_number, template, rows):
+    """Página do template `template`: 3 scripts e 1 estilo fixos por template, HTML dinâmico por request."""
+    static = [f'<style>.tpl-{template} {{ color: #{template:06x}; margin: 0 {template}px; }}</style>']
+    for n in range(3):
+        static.append(f"<script>function tpl{template}_{n}(x) {{ var total = x + {n}; return total * {template}; }}</script>")
+    rows_html = ''.join(f"""
+        <div class="ticket-item"><span>#{request_number}-{i}</span>
+            <strong>usuario{request_number}_{i}@empresa.com</strong></div>""" for i in range(rows))
+    return f"""<html><head>{static[0]}</head><body>
+    <div class="alert">Mensagem do request {request_number}</div>
+    {static[1]}
+    <main>{rows_html}</main>
+    {static[2]}
+    <footer>Gerado no request {request_number}</footer>
+    {static[3]}
+</body></html>"""
+
+
+class HtmlCachingMinifyCache(MinifyCache):
+    """Variante que também guarda o HTML dinâmico no LRU dos blocos (para comparação)."""
+
+    def _minify_html_text(self, text):
+        return self._cached('html', text, MinifyCache._minify_html_text)
+
+
+def _static_hit_rate(cache, pages):
+    """Minifica as páginas e retorna a taxa de acerto dos scripts/estilos na segunda metade."""
+    stats = {'lookups': 0, 'hits': 0}
+    cached = cache._cached
+
+    def counted(kind, content, minifier):
+        hits_before = cache.blocks.hits
+        result = cached(kind, content, minifier)
+        if kind in ('js', 'css'):
+            stats['lookups'] += 1
+            stats['hits'] += cache.blocks.hits - hits_before
+        return result
+
+    cache._cached = counted
+    half = len(pages) // 2
+    for page in pages[:half]:
+        cache.minify(page)
+    stats.update(lookups=0, hits=0)
+    for page in pages[half:]:
+        cache.minify(page)
+    return stats['hits'] / stats['lookups']
+
+
+def eviction_scenario(requests, templates, block_cache_size):
+    pages = [build_template_page(n, n % templates, rows=5) for n in range(requests)]
+    print(f'\nDescarte: {requests} requests, {templates} templates x 4 scripts/estilos, '
+          f'LRU de {block_cache_size} blocos')
+    for label, cache in (('só scripts/estilos', MinifyCache(block_cache_size)),
+                         ('scripts/estilos + HTML', HtmlCachingMinifyCache(block_cache_size))):
+        print(f'  {label:<24} acertos dos scripts/estilos: {_static_hit_rate(cache, pages):6.1%}')
+
+
+def baseline_minify(html):
+    for script in re.findall(r'<script>(.*?)</script>', html, re.DOTALL):
+        html = html.replace(script, jsmin(script, quote_chars="'\"`"))
+    return minify_html(html, remove_comments=True, remove_empty_space=True)
+
+
+def run(label, pages, minify):
+    start = time.process_time()
+    total_in = total_out = 0
+    for page in pages:
+        total_in += len(page)
+        total_out += len(minify(page))
+    elapsed = time.process_time() - start
+    print(f'{label:<28} {elapsed / len(pages) * 1000:8.2f} ms/resposta   '
+          f'{total_in / len(pages) / 1024:7.1f} KiB -> {total_out / len(pages) / 1024:7.1f} KiB')
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--rows', type=int, default=300)
+    parser.add_argument('--templates', type=int, default=100)
+    parser.add_argument('--block-cache-size', type=int, default=512)
+    args = parser.parse_args()
+
+    chart_script = _template_script('templates/setores/comercial/geral.html')
+    pages = [build_page(n, args.rows, chart_script) for n in range(args.requests)]
+
+    before = None
+    if minify_html is not None:
+        before = run('htmlmin + jsmin (antes)', pages, baseline_minify)
+    else:
+        print('htmlmin não instalado: medição "antes" pulada (pip install htmlmin)')
+    cache = MinifyCache()
+    after = run('MinifyCache (depois)', pages, cache.minify)
+    if before is not None:
+        print(f'Redução de CPU: {before / after:.1f}x', end='  ')
+    print(f'(acertos de cache: {cache.blocks.hits}, falhas: {cache.blocks.misses})')
+
+    eviction_scenario(max(args.requests, args.templates * 10), args.templates, args.block_cache_size)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,324 @@
+"""Teste de carga das rotas principais com dependências locais.
+
+Sobe a aplicação (`create_app`) num servidor HTTP local com:
+- um banco SQLite semeado (volumes de chamados, interações e anexos configuráveis);
+- arquivos Parquet de vendas sintéticos para o painel comercial;
+- um Firebase falso (benchmarks/fake_firebase.py) para login, token e usuários.
+
+Várias threads fazem login pela rota real e disparam uma mistura de requisições a
+`/tickets/`, `/tickets/<id>`, `/setor/comercial/geral`, `/setor/comercial/metas` e uploads de anexo
+(POST em `/tickets/<id>`). Ao final são reportados, por rota, vazão, latências
+(p50/p95/p99), média de consultas SQL por requisição (do cabeçalho Server-Timing
+da instrumentação) e o pico de memória residente do processo durante a carga.
+
+Cliente e servidor rodam no mesmo processo; os números servem para comparar
+versões na mesma máquina, não como capacidade absoluta de produção.
+
+Uso: python benchmarks/route_load.py [--threads 8] [--requests 50] [--tickets 500]
+                                     [--interactions 10] [--attachment-ratio 0.1]
+                                     [--sales-days 180] [--docs-per-day 200]
+                                     [--firebase-latency 0.0] [--seed 42]
+                                     [--json resultado.json] [--compare anterior.json]
+                                     [--tolerance 0.25]
+
+Com --compare, o script termina com código 1 se o p95 ou a média de consultas de
+alguma rota piorar mais que --tolerance em relação ao JSON informado (gerado
+por uma execução anterior com --json), o que permite usá-lo antes do deploy.
+"""
+import os
+import re
+import io
+import sys
+import json
+import time
+import random
+import argparse
+import resource
+import tempfile
+import threading
+import statistics
+from datetime import date
+from dateutil.relativedelta import relativedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_firebase import FakeFirebase
+from fixtures import seed_database, write_sales_parquet
+
+ADMIN_EMAIL = 'admin@empresa.com'
+USER_EMAIL = 'usuario@empresa.com'
+PASSWORD = 'senha123'
+
+# (rota, peso na mistura)
+SCENARIOS = [
+    ('tickets.list', 3),
+    ('tickets.view', 4),
+    ('comercial.geral', 2),
+    ('comercial.metas', 1),
+    ('tickets.upload', 1),
+]
+
+QUERY_COUNT_PATTERN = re.compile(r'desc="(\d+) queries"')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=50, help='requisições por thread')
+    parser.add_argument('--tickets', type=int, default=500)
+    parser.add_argument('--interactions', type=int, default=10, help='interações por chamado')
+    parser.add_argument('--attachment-ratio', type=float, default=0.1, help='fração de interações com anexo')
+    parser.add_argument('--sales-days', type=int, default=180)
+    parser.add_argument('--docs-per-day', type=int, default=200)
+    parser.add_argument('--firebase-latency', type=float, default=0.0, help='atraso do Firebase falso (s)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--workdir', help='diretório para banco, Parquet e uploads (padrão: temporário)')
+    parser.add_argument('--json', help='grava o resultado neste arquivo')
+    parser.add_argument('--compare', help='JSON de uma execução anterior para detectar regressões')
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    return parser.parse_args()
+
+
+class RssSampler:
+    """Acompanha o maior RSS do processo enquanto a carga roda (Linux: /proc/self/status)."""
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.peak_kb = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    @staticmethod
+    def current_kb():
+        try:
+            with open('/proc/self/status') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        return int(line.split()[1])
+        except OSError:
+            pass
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak_kb = max(self.peak_kb, self.current_kb())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.peak_kb = self.current_kb()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def prepare_environment(args, workdir, firebase):
+    os.chdir(workdir)
+    head_path = os.path.join(workdir, 'venda_head.parquet')
+    line_path = os.path.join(workdir, 'venda_line.parquet')
+    os.environ.update({
+        'DATABASE_URL_DB': f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+        'FLASK_SECRET_KEY': 'benchmark',
+        'APP_INSTRUMENTATION': '1',
+        'FIREBASE_API_KEY': 'benchmark',
+        'FIREBASE_AUTH_URL': firebase.auth_url,
+        'FIREBASE_TOKEN_URL': firebase.token_url,
+        'FIREBASE_DATABASE_URL': firebase.database_url,
+        'PARQUET_ANALISE_VENDA_HEAD': head_path,
+        'PARQUET_ANALISE_VENDA_LINE': line_path,
+    })
+    start = time.perf_counter()
+    head_rows, line_rows = write_sales_parquet(head_path, line_path, days=args.sales_days,
+                                               docs_per_day=args.docs_per_day, seed=args.seed)
+    print(f'Parquet: {head_rows} cabeçalhos, {line_rows} linhas ({time.perf_counter() - start:.1f} s)')
+
+
+def start_server(app):
+    import logging
+    from werkzeug.serving import make_server
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, name='app-server', daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_port}'
+
+
+def login(base_url, email):
+    import requests
+    session = requests.Session()
+    response = session.post(f'{base_url}/login', data={'email': email, 'password': PASSWORD},
+                            allow_redirects=False)
+    if response.status_code != 302 or 'session' not in session.cookies:
+        raise RuntimeError(f'Login de {email} falhou ({response.status_code})')
+    return session
+
+
+def build_request(scenario, rng, ticket_ids):
+    """Retorna (método, caminho, kwargs do requests) para o cenário."""
+    if scenario == 'tickets.list':
+        return 'GET', '/tickets/?status=Aberto&status=Em+Andamento&status=Aguardando+Resposta', {}
+    if scenario == 'tickets.view':
+        return 'GET', f'/tickets/{rng.choice(ticket_ids)}', {}
+    if scenario == 'comercial.geral':
+        first_day = date.today().replace(day=1) - relativedelta(months=1)
+        last_day = date.today().replace(day=1) - relativedelta(days=1)
+        return 'GET', f'/setor/comercial/geral?start_date={first_day}&end_date={last_day}', {}
+    if scenario == 'comercial.metas':
+        return 'GET', '/setor/comercial/metas', {}
+    if scenario == 'tickets.upload':
+        files = {'attachments': ('evidencia.pdf', io.BytesIO(os.urandom(rng.randint(10_000, 200_000))),
+                                 'application/pdf')}
+        data = {'form_action': 'add_interaction', 'reply_text': 'Segue evidência em anexo.', 'action': 'comment'}
+        return 'POST', f'/tickets/{rng.choice(ticket_ids)}', {'files': files, 'data': data}
+    raise ValueError(scenario)
+
+
+def worker(base_url, ticket_ids, args, seed, results, warmup):
+    rng = random.Random(seed)
+    session = login(base_url, ADMIN_EMAIL)
+    names = [name for name, _ in SCENARIOS]
+    weights = [weight for _, weight in SCENARIOS]
+
+    if warmup:
+        for name in names:
+            method, path, kwargs = build_request(name, rng, ticket_ids)
+            session.request(method, base_url + path, allow_redirects=False, **kwargs)
+
+    for _ in range(args.requests):
+        name = rng.choices(names, weights)[0]
+        method, path, kwargs = build_request(name, rng, ticket_ids)
+        start = time.perf_counter()
+        try:
+            response = session.request(method, base_url + path, allow_redirects=False, **kwargs)
+            elapsed = time.perf_counter() - start
+            ok = response.status_code < 400
+            match = QUERY_COUNT_PATTERN.search(response.headers.get('Server-Timing', ''))
+            queries = int(match.group(1)) if match else None
+        except Exception:
+            elapsed, ok, queries = time.perf_counter() - start, False, None
+        results.append((name, elapsed, ok, queries))
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def summarize(results, elapsed):
+    summary = {}
+    for name, _ in SCENARIOS:
+        rows = [r for r in results if r[0] == name]
+        if not rows:
+            continue
+        latencies = [r[1] for r in rows]
+        queries = [r[3] for r in rows if r[3] is not None]
+        summary[name] = {
+            'requests': len(rows),
+            'errors': sum(1 for r in rows if not r[2]),
+            'throughput': len(rows) / elapsed,
+            'p50_ms': statistics.median(latencies) * 1000,
+            'p95_ms': percentile(latencies, 95) * 1000,
+            'p99_ms': percentile(latencies, 99) * 1000,
+            'max_ms': max(latencies) * 1000,
+            'avg_queries': statistics.mean(queries) if queries else None,
+        }
+    return summary
+
+
+def print_summary(summary, elapsed, total, peak_rss_kb, baseline_rss_kb):
+    header = f"{'rota':<18}{'req':>6}{'erros':>7}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'máx ms':>9}{'SQL/req':>9}"
+    print(header)
+    print('-' * len(header))
+    for name, row in summary.items():
+        queries = f"{row['avg_queries']:.1f}" if row['avg_queries'] is not None else '-'
+        print(f"{name:<18}{row['requests']:>6}{row['errors']:>7}{row['throughput']:>9.1f}{row['p50_ms']:>9.1f}"
+              f"{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}{row['max_ms']:>9.1f}{queries:>9}")
+    print(f'\nTotal: {total} requisições em {elapsed:.2f} s  ->  {total / elapsed:.1f} req/s')
+    print(f'RSS: {baseline_rss_kb / 1024:.0f} MB antes da carga, pico de {peak_rss_kb / 1024:.0f} MB durante a carga')
+
+
+def compare(summary, previous_path, tolerance):
+    """Lista as rotas cujo p95 ou média de consultas piorou além da tolerância."""
+    with open(previous_path) as f:
+        previous = json.load(f)['routes']
+    regressions = []
+    for name, row in summary.items():
+        before = previous.get(name)
+        if not before:
+            continue
+        for metric in ('p95_ms', 'avg_queries'):
+            if row[metric] is None or not before.get(metric):
+                continue
+            change = row[metric] / before[metric] - 1
+            if change > tolerance:
+                regressions.append(f'{name}: {metric} {before[metric]:.1f} -> {row[metric]:.1f} (+{change:.0%})')
+    return regressions
+
+
+def main():
+    args = parse_args()
+    # O diretório de trabalho muda para o workdir (uploads usam caminhos relativos)
+    args.json = args.json and os.path.abspath(args.json)
+    args.compare = args.compare and os.path.abspath(args.compare)
+    workdir = os.path.abspath(args.workdir or tempfile.mkdtemp(prefix='carga_rotas_'))
+    os.makedirs(workdir, exist_ok=True)
+
+    firebase = FakeFirebase(users={
+        ADMIN_EMAIL: {'password': PASSWORD, 'roles': ['admin']},
+        USER_EMAIL: {'password': PASSWORD, 'roles': ['comercial'], 'codigo_vendedor': '1'},
+    }, latency=args.firebase_latency).start()
+    try:
+        prepare_environment(args, workdir, firebase)
+
+        from app import create_app
+        app = create_app()
+        start = time.perf_counter()
+        ticket_ids = seed_database(app, tickets=args.tickets, interactions_per_ticket=args.interactions,
+                                   attachment_ratio=args.attachment_ratio,
+                                   user_emails=(USER_EMAIL,), admin_email=ADMIN_EMAIL, seed=args.seed)
+        print(f'Banco: {len(ticket_ids)} chamados x {args.interactions} interações '
+              f'({time.perf_counter() - start:.1f} s) em {workdir}')
+
+        server, base_url = start_server(app)
+        results = []
+        threads = [threading.Thread(target=worker, args=(base_url, ticket_ids, args, args.seed + n, results, True))
+                   for n in range(args.threads)]
+        baseline_rss_kb = RssSampler.current_kb()
+        with RssSampler() as rss:
+            start = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - start
+        server.shutdown()
+    finally:
+        firebase.stop()
+
+    summary = summarize(results, elapsed)
+    print(f'\n{args.threads} threads x {args.requests} requisições, Firebase falso com '
+          f'{args.firebase_latency * 1000:.0f} ms de latência ({firebase.request_count} chamadas)\n')
+    print_summary(summary, elapsed, len(results), rss.peak_kb, baseline_rss_kb)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'args': vars(args), 'elapsed': elapsed, 'peak_rss_kb': rss.peak_kb,
+                       'routes': summary}, f, indent=2, default=str)
+
+    if args.compare:
+        regressions = compare(summary, args.compare, args.tolerance)
+        if regressions:
+            print('\nRegressões acima da tolerância:')
+            for regression in regressions:
+                print(f'  {regression}')
+            sys.exit(1)
+        print(f'\nSem regressões acima de {args.tolerance:.0%} em relação a {args.compare}.')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""Mede o tempo de cold start da aplicação (importação + create_app) em processos novos,
+como acontece a cada restart de worker do gunicorn, e lista os módulos mais caros
+segundo o `python -X importtime`.
+
+Uso: python benchmarks/startup_benchmark.py [--runs 10] [--top 15]
+"""
+import os
+import sys
+import statistics
+import subprocess
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STARTUP_SCRIPT = """
+import time
+start = time.perf_counter()
+from app import create_app
+create_app()
+print(time.perf_counter() - start)
+"""
+
+FIRST_USE_SCRIPT = """
+import time
+start = time.perf_counter()
+import services.commercial_service, services.financial_service, services.goals_service, services.conversion_service
+print(time.perf_counter() - start)
+"""
+
+
+def _env():
+    env = dict(os.environ)
+    env.setdefault('DATABASE_URL_DB', 'sqlite://')
+    env.setdefault('FLASK_SECRET_KEY', 'benchmark')
+    env['PYTHONPATH'] = ROOT + os.pathsep + env.get('PYTHONPATH', '')
+    return env
+
+
+def measure(script, runs):
+    timings = []
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, '-c', script], cwd=ROOT, env=_env(),
+                                capture_output=True, text=True, check=True)
+        timings.append(float(result.stdout.strip().splitlines()[-1]))
+    return timings
+
+
+def import_profile(top):
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', STARTUP_SCRIPT], cwd=ROOT, env=_env(),
+                            capture_output=True, text=True, check=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative_us, module = line.split('|', 2)
+        # Importações diretas do app (2º nível), para não contar o mesmo custo várias vezes
+        depth = (len(module) - len(module.lstrip()) - 1) // 2
+        if depth == 1:
+            rows.append((int(cumulative_us), module.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def report(label, timings):
+    print(f'{label:<38} mediana {statistics.median(timings) * 1000:8.1f} ms   '
+          f'mín {min(timings) * 1000:8.1f} ms   máx {max(timings) * 1000:8.1f} ms')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--top', type=int, default=15)
+    args = parser.parse_args()
+
+    report('import app + create_app()', measure(STARTUP_SCRIPT, args.runs))
+    report('1º acesso aos painéis (pandas/pyarrow)', measure(FIRST_USE_SCRIPT, args.runs))
+
+    print(f'\nMódulos mais caros no boot (-X importtime, top {args.top}):')
+    for cumulative_us, module in import_profile(args.top):
+        print(f'{cumulative_us / 1000:10.1f} ms  {module}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+import click
+
+
+def register_commands(app):
+    """Registra os comandos de manutenção no CLI do Flask (`flask <comando>`)."""
+
+    @app.cli.command('init-db')
+    def init_db():
+        """Cria as tabelas e adiciona as colunas e os índices que faltam (pode ser repetido)."""
+        from schema import upgrade_schema
+        changes = upgrade_schema()
+        for change in changes:
+            click.echo(f'  {change}')
+        click.echo('Banco de dados atualizado.' if changes else 'Banco de dados já está atualizado.')
+
+    @app.cli.command('sla-rebuild')
+    def sla_rebuild():
+        """Recalcula os resumos de SLA a partir do histórico de interações."""
+        from services.sla_service import rebuild_sla_summaries
+        count = rebuild_sla_summaries()
+        click.echo(f'{count} resumos de SLA recalculados.')
+
+    @app.cli.command('archive-tickets')
+    @click.option('--days', type=int, default=None, help='Dias desde o fechamento (padrão: TICKET_ARCHIVE_DAYS).')
+    @click.option('--batch-size', type=int, default=100, show_default=True)
+    def archive_tickets(days, batch_size):
+        """Move para o arquivo os chamados fechados há mais tempo que a janela configurada."""
+        from services.archive_service import archive_closed_tickets
+        count = archive_closed_tickets(days=days, batch_size=batch_size)
+        click.echo(f'{count} chamados arquivados.')
+
+    @app.cli.command('ticket-summary-repair')
+    @click.option('--batch-size', type=int, default=500, show_default=True)
+    def ticket_summary_repair(batch_size):
+        """Recalcula as colunas de resumo dos chamados (carga inicial ou reparo)."""
+        from services.ticket_summary import repair_summaries
+        count = repair_summaries(batch_size=batch_size)
+        click.echo(f'{count} resumos de chamados recalculados.')
+
+    @app.cli.command('ticket-summary-check')
+    @click.option('--batch-size', type=int, default=500, show_default=True)
+    def ticket_summary_check(batch_size):
+        """Compara as colunas de resumo dos chamados com os valores calculados."""
+        from services.ticket_summary import find_inconsistent_summaries
+        problems = find_inconsistent_summaries(batch_size=batch_size)
+        for ticket_id, column, stored, expected in problems:
+            click.echo(f'Chamado #{ticket_id}: {column} = {stored!r}, esperado {expected!r}')
+        if problems:
+            raise click.ClickException(
+                f'{len(problems)} divergências encontradas. Execute `flask ticket-summary-repair`.'
+            )
+        click.echo('Resumos dos chamados consistentes.')
+
+    @app.cli.command('validation-backfill')
+    @click.option('--batch-size', type=int, default=500, show_default=True)
+    def validation_backfill(batch_size):
+        """Cria os registros de ValidationRequest dos pedidos de validação já existentes."""
+        from services.validation_service import backfill_validation_requests
+        count = backfill_validation_requests(batch_size=batch_size)
+        click.echo(f'{count} pedidos de validação registrados.')
@@ -1,5 +1,5 @@
 import os
-import pyrebase
+import threading
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -14,6 +14,33 @@ firebase_config = {
     "appId": os.getenv('FIREBASE_APP_ID')
 }
 
-firebase = pyrebase.initialize_app(firebase_config)
-auth = firebase.auth()
-db = firebase.database()
\ No newline at end of file
+_firebase = None
+_firebase_lock = threading.Lock()
+
+
+def get_firebase():
+    """Inicializa o cliente do Firebase no primeiro uso (e não na importação do módulo)."""
+    global _firebase
+    if _firebase is None:
+        with _firebase_lock:
+            if _firebase is None:
+                from firebase_client import FirebaseClient
+                _firebase = FirebaseClient(firebase_config)
+    return _firebase
+
+
+class _LazyFirebaseService:
+    """Repassa os atributos para `firebase.auth()`/`firebase.database()`, criados no primeiro acesso."""
+
+    def __init__(self, factory_name):
+        self._factory_name = factory_name
+        self._service = None
+
+    def __getattr__(self, name):
+        if self._service is None:
+            self._service = getattr(get_firebase(), self._factory_name)()
+        return getattr(self._service, name)
+
+
+auth = _LazyFirebaseService('auth')
+db = _LazyFirebaseService('database')
@@ -0,0 +1,124 @@
+"""Configuração do banco de dados com um perfil ajustado para cada backend.
+
+`configure_database(app, db)` lê DATABASE_URL_DB, preenche SQLALCHEMY_DATABASE_URI
+e SQLALCHEMY_ENGINE_OPTIONS e chama `db.init_app`:
+
+- SQLite: journal em WAL (leituras não bloqueiam a escrita), `busy_timeout` para
+  esperar o lock em vez de falhar com "database is locked" e `synchronous=NORMAL`,
+  aplicados a cada conexão aberta pela engine da aplicação (outras engines do
+  processo não são afetadas).
+- PostgreSQL/MySQL/MariaDB: tamanho do pool e overflow, `pool_pre_ping` para
+  descartar conexões derrubadas pelo servidor, `pool_recycle` e um timeout por
+  comando (`max_execution_time` no MySQL, `max_statement_time` no MariaDB).
+
+Os valores podem ser ajustados por variáveis de ambiente (DB_POOL_SIZE,
+DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_STATEMENT_TIMEOUT_MS,
+SQLITE_BUSY_TIMEOUT_MS, SQLITE_SYNCHRONOUS). Com DATABASE_TUNING=0 nenhum perfil
+é aplicado e valem os padrões do SQLAlchemy.
+"""
+import os
+import sqlite3
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+SQLITE_SYNCHRONOUS_MODES = {'OFF', 'NORMAL', 'FULL', 'EXTRA'}
+
+
+def _int_env(name, default):
+    return int(os.getenv(name, default))
+
+
+def _sqlite_profile(url):
+    busy_timeout_ms = _int_env('SQLITE_BUSY_TIMEOUT_MS', 5000)
+    synchronous = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL').upper()
+    if synchronous not in SQLITE_SYNCHRONOUS_MODES:
+        synchronous = 'NORMAL'
+    in_memory = url.database in (None, '', ':memory:')
+
+    pragmas = [f'PRAGMA busy_timeout = {busy_timeout_ms}', f'PRAGMA synchronous = {synchronous}']
+    if not in_memory:
+        pragmas.insert(0, 'PRAGMA journal_mode = WAL')
+
+    options = {
+        # Conexões são compartilhadas entre as threads do worker via pool
+        'connect_args': {'timeout': busy_timeout_ms / 1000, 'check_same_thread': False},
+    }
+    return options, pragmas
+
+
+def _server_pool_options():
+    return {
+        'pool_size': _int_env('DB_POOL_SIZE', 5),
+        'max_overflow': _int_env('DB_MAX_OVERFLOW', 10),
+        'pool_timeout': _int_env('DB_POOL_TIMEOUT', 30),
+        'pool_recycle': _int_env('DB_POOL_RECYCLE', 1800),
+        'pool_pre_ping': True,
+    }
+
+
+def _postgresql_profile():
+    options = _server_pool_options()
+    statement_timeout = _int_env('DB_STATEMENT_TIMEOUT_MS', 30000)
+    options['connect_args'] = {'options': f'-c statement_timeout={statement_timeout}'}
+    return options
+
+
+def _mysql_profile(mariadb=False):
+    options = _server_pool_options()
+    # Abaixo do wait_timeout padrão de vários provedores gerenciados
+    options['pool_recycle'] = _int_env('DB_POOL_RECYCLE', 280)
+    statement_timeout = _int_env('DB_STATEMENT_TIMEOUT_MS', 30000)
+    if mariadb:
+        # O MariaDB não tem max_execution_time; o equivalente é em segundos
+        init_command = f'SET SESSION max_statement_time={statement_timeout / 1000:g}'
+    else:
+        init_command = f'SET SESSION max_execution_time={statement_timeout}'
+    options['connect_args'] = {'init_command': init_command}
+    return options
+
+
+def engine_profile(database_uri):
+    """Retorna (opções do create_engine, pragmas do SQLite) para a URL informada."""
+    url = make_url(database_uri)
+    backend = url.get_backend_name()
+    if backend == 'sqlite':
+        return _sqlite_profile(url)
+    if backend == 'postgresql':
+        return _postgresql_profile(), []
+    if backend == 'mysql':
+        return _mysql_profile(), []
+    if backend == 'mariadb':
+        return _mysql_profile(mariadb=True), []
+    return {}, []
+
+
+def _sqlite_pragma_listener(pragmas):
+    def apply_pragmas(dbapi_connection, connection_record):
+        if not isinstance(dbapi_connection, sqlite3.Connection):
+            return
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+    return apply_pragmas
+
+
+def configure_database(app, db):
+    """Define a URL e as opções de engine conforme o backend e inicializa `db` na aplicação."""
+    database_uri = os.getenv('DATABASE_URL_DB')
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_uri
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+
+    pragmas = []
+    if database_uri and os.getenv('DATABASE_TUNING', '1').lower() not in ('0', 'false', 'no'):
+        options, pragmas = engine_profile(database_uri)
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+
+    db.init_app(app)
+
+    if pragmas:
+        # Só a engine desta aplicação; ainda não há conexões abertas no pool
+        with app.app_context():
+            event.listen(db.engine, 'connect', _sqlite_pragma_listener(pragmas))
@@ -1,5 +1,6 @@
 from functools import wraps
 from flask import session, redirect, url_for, flash
+import authz
 
 def login_required(f):
     @wraps(f)
@@ -18,9 +19,8 @@ def roles_required(allowed_roles):
                 flash('Você precisa estar logado para ver esta página.', 'warning')
                 return redirect(url_for('auth.login'))
             
-            user_roles = session.get('user', {}).get('roles', {})
-            # Verifica se o usuário tem pelo menos uma das roles permitidas
-            if not any(role in user_roles for role in allowed_roles):
+            # Verifica se o usuário tem pelo menos uma das roles permitidas (roles em cache, ver authz.py)
+            if not authz.has_any_role(*allowed_roles):
                 flash('Você não tem permissão para acessar esta página.', 'danger')
                 return redirect(url_for('main.home'))
             
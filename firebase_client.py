@@ -0,0 +1,228 @@
+"""Cliente HTTP do Firebase (Authentication e Realtime Database via REST).
+
+Substitui o Pyrebase com a mesma interface usada pela aplicação
+(`auth.sign_in_with_email_and_password`, `auth.refresh`,
+`auth.create_user_with_email_and_password`, `db.child(...).get/set/update`), mas
+com uma única `requests.Session` por processo: as conexões ficam abertas
+(keep-alive) em um pool dimensionado para a concorrência do worker, e login e
+páginas de administração deixam de pagar um handshake TLS por chamada.
+
+Cada chamada tem timeout de conexão e de leitura, um número limitado de novas
+tentativas com backoff exponencial (só para erros transitórios e, em requisições
+não idempotentes, só quando a conexão nem chegou a ser aberta) e passa por um
+semáforo que limita as chamadas simultâneas ao Firebase.
+
+As URLs base são configuráveis (FIREBASE_AUTH_URL, FIREBASE_TOKEN_URL e
+FIREBASE_DATABASE_URL), o que permite apontar o cliente para um servidor HTTP
+local que simule o Firebase.
+"""
+import os
+import time
+import random
+import threading
+from contextlib import contextmanager
+from urllib.parse import quote
+import requests
+from requests.adapters import HTTPAdapter
+
+AUTH_URL = os.getenv('FIREBASE_AUTH_URL', 'https://identitytoolkit.googleapis.com/v1')
+TOKEN_URL = os.getenv('FIREBASE_TOKEN_URL', 'https://securetoken.googleapis.com/v1/token')
+
+POOL_SIZE = int(os.getenv('FIREBASE_POOL_SIZE', 10))
+MAX_CONCURRENCY = int(os.getenv('FIREBASE_MAX_CONCURRENCY', POOL_SIZE))
+CONNECT_TIMEOUT = float(os.getenv('FIREBASE_CONNECT_TIMEOUT', 3.05))
+READ_TIMEOUT = float(os.getenv('FIREBASE_READ_TIMEOUT', 10))
+QUEUE_TIMEOUT = float(os.getenv('FIREBASE_QUEUE_TIMEOUT', 5))
+MAX_RETRIES = int(os.getenv('FIREBASE_MAX_RETRIES', 2))
+BACKOFF_SECONDS = float(os.getenv('FIREBASE_BACKOFF_SECONDS', 0.2))
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class FirebaseError(Exception):
+    """Erro retornado pelo Firebase (ou falha de comunicação com ele)."""
+
+    def __init__(self, message, status=None, body=None):
+        super().__init__(f'{message} ({status})' if status else message)
+        self.message = message
+        self.status = status
+        self.body = body
+
+
+def _error_from_response(response):
+    try:
+        error = response.json().get('error')
+    except ValueError:
+        error = None
+    if isinstance(error, dict):
+        message = error.get('message') or response.reason
+    else:
+        message = error or response.reason
+    return FirebaseError(message, status=response.status_code, body=response.text)
+
+
+class FirebaseHttp:
+    """Sessão HTTP compartilhada com pool de conexões, timeouts, retries e limite de concorrência."""
+
+    def __init__(self, pool_size=POOL_SIZE, max_concurrency=MAX_CONCURRENCY,
+                 timeout=(CONNECT_TIMEOUT, READ_TIMEOUT), retries=MAX_RETRIES,
+                 backoff=BACKOFF_SECONDS, queue_timeout=QUEUE_TIMEOUT):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    @contextmanager
+    def _slot(self):
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            raise FirebaseError('Limite de requisições simultâneas ao Firebase atingido')
+        try:
+            yield
+        finally:
+            self._slots.release()
+
+    def _sleep_before_retry(self, attempt):
+        delay = self.backoff * (2 ** attempt)
+        time.sleep(delay / 2 + random.uniform(0, delay / 2))
+
+    def request(self, method, url, idempotent=True, **kwargs):
+        """Executa a requisição e retorna o JSON da resposta; levanta FirebaseError em caso de erro."""
+        for attempt in range(self.retries + 1):
+            last_attempt = attempt == self.retries
+            try:
+                with self._slot():
+                    response = self.session.request(method, url, timeout=self.timeout, **kwargs)
+            except requests.ConnectTimeout as e:
+                # A conexão não foi aberta: repetir é seguro mesmo para POST
+                if last_attempt:
+                    raise FirebaseError(f'Tempo de conexão com o Firebase esgotado: {e}') from e
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if last_attempt or not idempotent:
+                    raise FirebaseError(f'Falha de comunicação com o Firebase: {e}') from e
+            else:
+                if response.ok:
+                    return response.json() if response.content else None
+                if last_attempt or not idempotent or response.status_code not in RETRY_STATUSES:
+                    raise _error_from_response(response)
+            self._sleep_before_retry(attempt)
+
+    def close(self):
+        self.session.close()
+
+
+class FirebaseAuth:
+    """Endpoints REST do Firebase Authentication usados pela aplicação."""
+
+    def __init__(self, http, api_key, auth_url=AUTH_URL, token_url=TOKEN_URL):
+        self.http = http
+        self.api_key = api_key
+        self.auth_url = auth_url.rstrip('/')
+        self.token_url = token_url
+
+    def sign_in_with_email_and_password(self, email, password):
+        return self.http.request(
+            'POST', f'{self.auth_url}/accounts:signInWithPassword', params={'key': self.api_key},
+            json={'email': email, 'password': password, 'returnSecureToken': True}
+        )
+
+    def create_user_with_email_and_password(self, email, password):
+        # Não idempotente: uma nova tentativa após timeout de leitura poderia duplicar o cadastro
+        return self.http.request(
+            'POST', f'{self.auth_url}/accounts:signUp', params={'key': self.api_key},
+            json={'email': email, 'password': password, 'returnSecureToken': True}, idempotent=False
+        )
+
+    def refresh(self, refresh_token):
+        data = self.http.request(
+            'POST', self.token_url, params={'key': self.api_key},
+            data={'grant_type': 'refresh_token', 'refresh_token': refresh_token}
+        )
+        return {
+            'userId': data['user_id'],
+            'idToken': data['id_token'],
+            'refreshToken': data['refresh_token'],
+            'expiresIn': data.get('expires_in', 3600),
+        }
+
+
+class FirebaseItem:
+    def __init__(self, key, value):
+        self._key = key
+        self._value = value
+
+    def key(self):
+        return self._key
+
+    def val(self):
+        return self._value
+
+
+class FirebaseResponse:
+    """Resultado de uma leitura do Realtime Database, com a interface `val()`/`each()` do Pyrebase."""
+
+    def __init__(self, value):
+        self._value = value
+
+    def val(self):
+        return self._value
+
+    def each(self):
+        if isinstance(self._value, dict):
+            return [FirebaseItem(key, value) for key, value in self._value.items()]
+        if isinstance(self._value, list):
+            return [FirebaseItem(index, value) for index, value in enumerate(self._value) if value is not None]
+        return None
+
+
+class DatabaseReference:
+    """Caminho no Realtime Database. Imutável: `child()` retorna uma nova referência,
+    então a mesma raiz pode ser usada por várias threads ao mesmo tempo."""
+
+    def __init__(self, http, database_url, path=()):
+        self.http = http
+        self.database_url = (database_url or '').rstrip('/')
+        self.path = path
+
+    def child(self, *parts):
+        segments = tuple(segment for part in parts for segment in str(part).split('/') if segment)
+        return DatabaseReference(self.http, self.database_url, self.path + segments)
+
+    def _url(self):
+        return f"{self.database_url}/{'/'.join(quote(segment, safe='') for segment in self.path)}.json"
+
+    @staticmethod
+    def _params(token):
+        return {'auth': token} if token else None
+
+    def get(self, token=None):
+        return FirebaseResponse(self.http.request('GET', self._url(), params=self._params(token)))
+
+    def set(self, data, token=None):
+        return self.http.request('PUT', self._url(), params=self._params(token), json=data)
+
+    def update(self, data, token=None):
+        return self.http.request('PATCH', self._url(), params=self._params(token), json=data)
+
+    def remove(self, token=None):
+        return self.http.request('DELETE', self._url(), params=self._params(token))
+
+
+class FirebaseClient:
+    def __init__(self, config, http=None):
+        self.config = config
+        self.http = http or FirebaseHttp()
+        self.database_url = config.get('databaseURL')
+
+    def auth(self):
+        return FirebaseAuth(self.http, self.config.get('apiKey'))
+
+    def database(self):
+        return DatabaseReference(self.http, self.database_url)
+
+    def close(self):
+        self.http.close()
@@ -0,0 +1,40 @@
+"""Cache de fragmentos de template.
+
+Nos templates, um trecho é envolvido por um bloco `call`:
+
+    {% call cached_fragment('interaction', interaction.id, ticket.version, viewer_role) %}
+        ...
+    {% endcall %}
+
+O HTML do trecho fica em um LRU indexado pela chave (nome, id do objeto, versão,
+papel de quem vê). A versão é a coluna `Ticket.version`, incrementada pelo
+ticket_service em toda alteração do chamado; uma chave com versão antiga
+simplesmente deixa de ser usada e sai do LRU. Como a versão vem do banco, a
+invalidação vale para todos os workers. Em modo DEBUG o cache fica desligado
+para que alterações nos templates apareçam imediatamente.
+"""
+import os
+from markupsafe import Markup
+from cache import LRUCache
+
+
+def viewer_role(is_admin):
+    return 'admin' if is_admin else 'user'
+
+
+def init_fragment_cache(app, maxsize=None):
+    """Registra a global `cached_fragment` nos templates da aplicação."""
+    if maxsize is None:
+        maxsize = int(os.getenv('FRAGMENT_CACHE_SIZE', 4096))
+    fragments = LRUCache(maxsize)
+    app.extensions['fragment_cache'] = fragments
+    enabled = maxsize > 0 and not app.debug
+
+    def cached_fragment(name, *key, caller):
+        if not enabled:
+            return caller()
+        return fragments.get_or_set((name,) + key, lambda: Markup(caller()))
+
+    app.jinja_env.globals['cached_fragment'] = cached_fragment
+    app.jinja_env.globals['viewer_role'] = viewer_role
+    return fragments
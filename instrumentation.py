@@ -0,0 +1,307 @@
+"""Instrumentação opcional da aplicação.
+
+Ativada com APP_INSTRUMENTATION=1. Mede, por request, o número e o tempo das
+consultas SQL, o tempo de chamadas externas (Firebase), de etapas internas
+(Parquet/pandas), de renderização dos templates e da minificação. Os totais vão
+para o cabeçalho `Server-Timing` e para o endpoint `/metrics` (formato texto do
+Prometheus), acessível com `Authorization: Bearer <METRICS_TOKEN>` ou por um
+administrador logado. Com APP_PROFILER=1, um profiler por amostragem grava as pilhas dos
+requests mais lentos que APP_PROFILE_SLOW_MS em arquivos `.folded` (formato
+aceito pelo flamegraph.pl / speedscope) em APP_PROFILE_DIR.
+"""
+import os
+import sys
+import hmac
+import time
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import wraps
+from flask import g, request, has_request_context, Response, abort
+from flask.signals import before_render_template, template_rendered
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+_enabled = False
+_lock = threading.Lock()
+
+HISTOGRAM_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Métricas acumuladas no processo: {(nome, labels ordenados): valor}
+_counters = defaultdict(float)
+_histograms = {}
+
+
+def is_enabled():
+    return _enabled
+
+
+def _labels_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _inc(metric, value=1.0, **labels):
+    with _lock:
+        _counters[(metric, _labels_key(labels))] += value
+
+
+def _observe(metric, value, **labels):
+    key = (metric, _labels_key(labels))
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = {'buckets': [0] * len(HISTOGRAM_BUCKETS), 'sum': 0.0, 'count': 0}
+        for i, bound in enumerate(HISTOGRAM_BUCKETS):
+            if value <= bound:
+                histogram['buckets'][i] += 1
+        histogram['sum'] += value
+        histogram['count'] += 1
+
+
+def _format_labels(labels, extra=None):
+    items = list(labels) + (extra or [])
+    if not items:
+        return ''
+    escaped = ['{}="{}"'.format(k, str(v).replace('\\', '\\\\').replace('"', '\\"')) for k, v in items]
+    return '{' + ','.join(escaped) + '}'
+
+
+def render_metrics():
+    """Serializa as métricas no formato de exposição texto do Prometheus."""
+    lines = []
+    with _lock:
+        counters = sorted(_counters.items())
+        histograms = sorted((k, dict(v, buckets=list(v['buckets']))) for k, v in _histograms.items())
+
+    declared = set()
+    for (name, labels), value in counters:
+        if name not in declared:
+            lines.append(f'# TYPE {name} counter')
+            declared.add(name)
+        lines.append(f'{name}{_format_labels(labels)} {value}')
+
+    for (name, labels), histogram in histograms:
+        if name not in declared:
+            lines.append(f'# TYPE {name} histogram')
+            declared.add(name)
+        for bound, count in zip(HISTOGRAM_BUCKETS, histogram['buckets']):
+            lines.append(f'{name}_bucket{_format_labels(labels, [("le", bound)])} {count}')
+        lines.append(f'{name}_bucket{_format_labels(labels, [("le", "+Inf")])} {histogram["count"]}')
+        lines.append(f'{name}_sum{_format_labels(labels)} {histogram["sum"]}')
+        lines.append(f'{name}_count{_format_labels(labels)} {histogram["count"]}')
+
+    return '\n'.join(lines) + '\n'
+
+
+def _request_timings():
+    if not _enabled or not has_request_context():
+        return None
+    return g.get('_timings')
+
+
+@contextmanager
+def track(category, name):
+    """Mede um trecho de código como chamada externa ('external') ou etapa interna ('stage')."""
+    if not _enabled:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        _inc('app_operation_seconds_total', elapsed, category=category, operation=name)
+        _inc('app_operation_calls_total', category=category, operation=name)
+        timings = _request_timings()
+        if timings is not None:
+            timings[category] += elapsed
+
+
+def tracked(category, name=None):
+    """Versão decorador de `track`."""
+    def decorator(f):
+        operation = name or f.__name__
+
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            with track(category, operation):
+                return f(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# --- SQL -------------------------------------------------------------------
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('_query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('_query_start')
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    timings = _request_timings()
+    if timings is not None:
+        timings['sql'] += elapsed
+        timings['sql_count'] += 1
+
+
+# --- Templates ---------------------------------------------------------------
+
+def _before_render(sender, template, context, **extra):
+    timings = _request_timings()
+    if timings is not None:
+        g._render_stack.append(time.perf_counter())
+
+
+def _after_render(sender, template, context, **extra):
+    timings = _request_timings()
+    if timings is not None and g._render_stack:
+        elapsed = time.perf_counter() - g._render_stack.pop()
+        # Apenas o template de nível mais alto conta, para não somar includes duas vezes
+        if not g._render_stack:
+            timings['render'] += elapsed
+        _observe('app_template_render_seconds', elapsed, template=template.name or '-')
+
+
+# --- Profiler por amostragem -------------------------------------------------
+
+class SamplingProfiler:
+    """Amostra periodicamente as pilhas das threads que estão atendendo requests."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._active = {}
+        self._active_lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+            self._thread.start()
+
+    def begin(self, thread_id):
+        samples = defaultdict(int)
+        with self._active_lock:
+            self._active[thread_id] = samples
+        return samples
+
+    def end(self, thread_id):
+        with self._active_lock:
+            return self._active.pop(thread_id, None)
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            with self._active_lock:
+                active = dict(self._active)
+            if not active:
+                continue
+            frames = sys._current_frames()
+            for thread_id, samples in active.items():
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    samples[self._collapse(frame)] += 1
+
+    @staticmethod
+    def _collapse(frame):
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})')
+            frame = frame.f_back
+        return ';'.join(reversed(stack))
+
+
+def _dump_profile(samples, directory, endpoint, duration):
+    os.makedirs(directory, exist_ok=True)
+    filename = f"{time.strftime('%Y%m%d-%H%M%S')}_{int(duration * 1000)}ms_{endpoint}.folded"
+    with open(os.path.join(directory, filename.replace('/', '_')), 'w', encoding='utf-8') as f:
+        for stack, count in samples.items():
+            f.write(f'{stack} {count}\n')
+
+
+# --- Integração com o Flask ----------------------------------------------------
+
+def init_instrumentation(app):
+    """Registra os hooks de medição. Deve ser chamada antes de registrar a minificação."""
+    global _enabled
+    _enabled = True
+
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+    before_render_template.connect(_before_render, app)
+    template_rendered.connect(_after_render, app)
+
+    profiler = None
+    if os.getenv('APP_PROFILER', '').lower() in ('1', 'true', 'yes'):
+        profiler = SamplingProfiler(interval=float(os.getenv('APP_PROFILE_INTERVAL_MS', 5)) / 1000)
+        profiler.start()
+    slow_threshold = float(os.getenv('APP_PROFILE_SLOW_MS', 500)) / 1000
+    profile_dir = os.getenv('APP_PROFILE_DIR', 'profiles')
+    metrics_token = os.getenv('METRICS_TOKEN')
+
+    @app.before_request
+    def start_request_timer():
+        g._timings = defaultdict(float)
+        g._render_stack = []
+        g._request_start = time.perf_counter()
+        if profiler:
+            g._profile_samples = profiler.begin(threading.get_ident())
+
+    # Registrado antes da minificação: roda depois dela e fecha a medição do request
+    @app.after_request
+    def finish_request_timer(response):
+        timings = g.get('_timings')
+        if timings is None:
+            return response
+        if g.get('_minify_start') is not None:
+            timings['minify'] = time.perf_counter() - g._minify_start
+        duration = time.perf_counter() - g._request_start
+        endpoint = request.endpoint or 'unknown'
+
+        _observe('app_request_duration_seconds', duration, endpoint=endpoint, method=request.method)
+        _inc('app_requests_total', endpoint=endpoint, method=request.method, status=response.status_code)
+        _inc('app_sql_queries_total', timings['sql_count'], endpoint=endpoint)
+        for part in ('sql', 'external', 'stage', 'render', 'minify'):
+            if timings[part]:
+                _inc('app_request_part_seconds_total', timings[part], endpoint=endpoint, part=part)
+
+        server_timing = [f'total;dur={duration * 1000:.1f}', f'sql;dur={timings["sql"] * 1000:.1f};desc="{int(timings["sql_count"])} queries"']
+        for part in ('external', 'stage', 'render', 'minify'):
+            server_timing.append(f'{part};dur={timings[part] * 1000:.1f}')
+        response.headers['Server-Timing'] = ', '.join(server_timing)
+
+        if profiler:
+            samples = profiler.end(threading.get_ident())
+            if samples and duration >= slow_threshold:
+                _dump_profile(samples, profile_dir, endpoint, duration)
+        return response
+
+    @app.teardown_request
+    def discard_profile_samples(exception=None):
+        if profiler:
+            profiler.end(threading.get_ident())
+
+    def metrics():
+        import authz
+        has_token = bool(metrics_token) and hmac.compare_digest(
+            request.headers.get('Authorization', '').encode(), f'Bearer {metrics_token}'.encode())
+        if not has_token and not authz.is_admin():
+            abort(403)
+        return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
+
+    app.add_url_rule('/metrics', 'metrics', metrics)
+
+
+def instrument_minify(app):
+    """Marca o início da minificação. Deve ser chamada depois de registrá-la."""
+
+    # Registrado depois da minificação: roda antes dela
+    @app.after_request
+    def start_minify_timer(response):
+        if _request_timings() is not None:
+            g._minify_start = time.perf_counter()
+        return response
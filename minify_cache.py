@@ -0,0 +1,88 @@
+"""Minificação das respostas HTML com cache por hash de conteúdo.
+
+O documento é dividido em blocos: scripts e estilos inline (minificados com
+jsmin/rcssmin), `<pre>`/`<textarea>` (mantidos como estão) e o HTML entre eles.
+Scripts e estilos saem dos templates iguais em todo request (Chart.js, layout):
+cada um é minificado uma única vez e guardado em um LRU pelo hash do seu
+conteúdo. O HTML entre eles muda a cada request (linhas de chamados, mensagens,
+e-mails) e não entra no cache, onde só ocuparia espaço com chaves que nunca se
+repetem; ele é minificado direto, com expressões regulares, que custam pouco.
+"""
+import re
+import hashlib
+from jsmin import jsmin
+from rcssmin import cssmin
+from cache import LRUCache
+
+_BLOCK_RE = re.compile(r'(<(script|style|pre|textarea)\b[^>]*>)(.*?)(</\2\s*>)', re.DOTALL | re.IGNORECASE)
+_TYPE_RE = re.compile(r'\btype\s*=\s*["\']?([^"\'\s>]+)', re.IGNORECASE)
+_COMMENT_RE = re.compile(r'<!--(?!\[if).*?-->', re.DOTALL)
+_WHITESPACE_RE = re.compile(r'\s+')
+
+_JS_TYPES = {'text/javascript', 'application/javascript', 'module'}
+
+
+def _content_key(kind, content):
+    return kind, hashlib.blake2b(content.encode('utf-8'), digest_size=16).digest()
+
+
+class MinifyCache:
+    def __init__(self, block_cache_size=512):
+        self.blocks = LRUCache(block_cache_size)
+
+    def _cached(self, kind, content, minifier):
+        return self.blocks.get_or_set(_content_key(kind, content), lambda: minifier(content))
+
+    @staticmethod
+    def _minify_html_text(text):
+        text = _COMMENT_RE.sub('', text)
+        return _WHITESPACE_RE.sub(' ', text)
+
+    @staticmethod
+    def _minify_js(script):
+        return jsmin(script, quote_chars="'\"`").strip()
+
+    @staticmethod
+    def _minify_css(style):
+        return cssmin(style)
+
+    def _minify_block(self, match):
+        opening, tag, content, closing = match.group(1), match.group(2).lower(), match.group(3), match.group(4)
+        if tag == 'script':
+            script_type = _TYPE_RE.search(opening)
+            if content.strip() and (not script_type or script_type.group(1).lower() in _JS_TYPES):
+                content = self._cached('js', content, self._minify_js)
+        elif tag == 'style':
+            content = self._cached('css', content, self._minify_css)
+        return opening, content, closing
+
+    def minify(self, html):
+        """Retorna o HTML minificado, reaproveitando scripts e estilos já processados."""
+        parts = []
+        position = 0
+        for match in _BLOCK_RE.finditer(html):
+            text = html[position:match.start()]
+            if text:
+                parts.append(self._minify_html_text(text))
+            parts.extend(self._minify_block(match))
+            position = match.end()
+        tail = html[position:]
+        if tail:
+            parts.append(self._minify_html_text(tail))
+
+        return ''.join(parts).strip()
+
+
+def init_minify(app, block_cache_size=512):
+    """Registra a minificação das respostas HTML da aplicação."""
+    minifier = MinifyCache(block_cache_size)
+    app.extensions['minify_cache'] = minifier
+
+    @app.after_request
+    def minify_response(response):
+        if (response.mimetype == 'text/html' and not response.direct_passthrough
+                and not response.is_streamed and response.status_code == 200):
+            response.set_data(minifier.minify(response.get_data(as_text=True)))
+        return response
+
+    return minifier
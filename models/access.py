@@ -0,0 +1,10 @@
+from models.ticket import db
+
+class UserAccessVersion(db.Model):
+    """Versão das roles de um usuário (uid do Firebase), incrementada a cada edição.
+
+    Compartilhada entre os processos do servidor: authz compara a versão gravada
+    com a da entrada em cache e relê as roles quando ela mudou.
+    """
+    uid = db.Column(db.String(128), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=1)
@@ -0,0 +1,26 @@
+from datetime import datetime
+from models.ticket import db
+
+class ArchivedTicket(db.Model):
+    """Chamado fechado movido para o arquivo; `payload` guarda etapas, interações e anexos."""
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False) # mesmo id do chamado original
+    title = db.Column(db.String(150), nullable=False, index=True)
+    urgency = db.Column(db.String(50), nullable=False)
+    sector = db.Column(db.String(50), nullable=False, index=True)
+    user_email = db.Column(db.String(120), nullable=False, index=True)
+    assigned_user_email = db.Column(db.String(120), nullable=True)
+    ticket_type = db.Column(db.String(50), default='chamado')
+    status = db.Column(db.String(50), nullable=False)
+    created_at = db.Column(db.DateTime, nullable=True)
+    closed_at = db.Column(db.DateTime, nullable=True, index=True)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+    payload = db.Column(db.JSON, nullable=False)
+
+class ArchivedAttachment(db.Model):
+    """Anexo de um chamado arquivado; o arquivo fica compactado com gzip."""
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False) # mesmo id do anexo original
+    ticket_id = db.Column(db.Integer, db.ForeignKey('archived_ticket.id'), nullable=False, index=True)
+    filename = db.Column(db.String(150), nullable=False)
+    filepath = db.Column(db.String(300), nullable=True) # None se o arquivo original não existia mais
+    original_size = db.Column(db.Integer, nullable=True)
+    compressed_size = db.Column(db.Integer, nullable=True)
@@ -0,0 +1,13 @@
+from datetime import datetime
+from models.ticket import db
+
+class SellerGoal(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    codigo_vendedor = db.Column(db.String(50), nullable=False, index=True)
+    period = db.Column(db.String(7), nullable=False, index=True) # YYYY-MM
+    meta_valor = db.Column(db.Float, nullable=False, default=0)
+    meta_peso = db.Column(db.Float, nullable=False, default=0)
+    updated_by = db.Column(db.String(120), nullable=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (db.UniqueConstraint('codigo_vendedor', 'period', name='uq_seller_goal_period'),)
@@ -4,6 +4,7 @@ from datetime import datetime
 db = SQLAlchemy()
 
 class ProjectStage(db.Model):
+    __table_args__ = {'sqlite_autoincrement': True} # ids não são reutilizados após o arquivamento
     id = db.Column(db.Integer, primary_key=True)
     ticket_id = db.Column(db.Integer, db.ForeignKey('ticket.id'), nullable=False)
     name = db.Column(db.String(150), nullable=False)
@@ -13,6 +14,7 @@ class ProjectStage(db.Model):
     attachments = db.relationship('Attachment', backref='project_stage', lazy=True, cascade="all, delete-orphan")
 
 class Ticket(db.Model):
+    __table_args__ = {'sqlite_autoincrement': True} # ids não são reutilizados após o arquivamento
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(150), nullable=False)
     urgency = db.Column(db.String(50), nullable=False)
@@ -26,6 +28,16 @@ class Ticket(db.Model):
     assigned_user_email = db.Column(db.String(120), nullable=True)
     
     ticket_type = db.Column(db.String(50), default='chamado') # chamado ou projeto
+
+    # Incrementada a cada alteração no chamado, etapas, interações ou anexos (cache de fragmentos)
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+
+    # Resumo desnormalizado, recalculado junto com a versão (services/ticket_summary.py)
+    last_activity_at = db.Column(db.DateTime, nullable=True, index=True)
+    interaction_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    pending_validation_count = db.Column(db.Integer, nullable=False, default=0, server_default='0', index=True)
+    stages_total = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    stages_done = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     
     attachments = db.relationship('Attachment', backref='ticket', lazy=True, cascade="all, delete-orphan")
     interactions = db.relationship('Interaction', backref='ticket', lazy=True, cascade="all, delete-orphan", 
@@ -33,22 +45,30 @@ class Ticket(db.Model):
                                    primaryjoin="Interaction.ticket_id == Ticket.id and Interaction.parent_id == None")
     
     project_stages = db.relationship('ProjectStage', backref='ticket', lazy=True, cascade="all, delete-orphan")
+
+    sla = db.relationship('TicketSla', backref='ticket', lazy=True, uselist=False, cascade="all, delete-orphan")
+
+    validation_requests = db.relationship('ValidationRequest', backref='ticket', lazy=True, cascade="all, delete-orphan")
     
     @property
     def completed_stages_count(self):
-        return len([s for s in self.project_stages if s.status == 'Finalizado'])
+        return self.stages_done or 0
 
     @property
     def total_stages_count(self):
-        return len(self.project_stages)
+        return self.stages_total or 0
 
     @property
     def progress(self):
-        if self.ticket_type != 'projeto' or not self.project_stages:
+        if self.ticket_type != 'projeto' or not self.total_stages_count:
             return 0
-        return (self.completed_stages_count / self.total_stages_count) * 100 if self.project_stages else 0
+        return (self.completed_stages_count / self.total_stages_count) * 100
 
 class Interaction(db.Model):
+    __table_args__ = (
+        db.Index('ix_interaction_ticket_timeline', 'ticket_id', 'timestamp', 'id'), # linha do tempo paginada
+        {'sqlite_autoincrement': True}, # ids não são reutilizados após o arquivamento
+    )
     id = db.Column(db.Integer, primary_key=True)
     ticket_id = db.Column(db.Integer, db.ForeignKey('ticket.id'), nullable=False)
     user_email = db.Column(db.String(120), nullable=False)
@@ -68,9 +88,47 @@ class Interaction(db.Model):
                                lazy=True, cascade="all, delete-orphan")
 
 class Attachment(db.Model):
+    __table_args__ = {'sqlite_autoincrement': True} # ids não são reutilizados após o arquivamento
     id = db.Column(db.Integer, primary_key=True)
     ticket_id = db.Column(db.Integer, db.ForeignKey('ticket.id'))
     interaction_id = db.Column(db.Integer, db.ForeignKey('interaction.id'))
     project_stage_id = db.Column(db.Integer, db.ForeignKey('project_stage.id'), nullable=True)
     filepath = db.Column(db.String(300), nullable=False)
-    filename = db.Column(db.String(150), nullable=False)
\ No newline at end of file
+    filename = db.Column(db.String(150), nullable=False)
+
+class TicketSla(db.Model):
+    """Resumo de SLA de um chamado, atualizado a cada interação (sem reprocessar o histórico)."""
+    ticket_id = db.Column(db.Integer, db.ForeignKey('ticket.id'), primary_key=True)
+    first_response_at = db.Column(db.DateTime, nullable=True)
+    first_response_seconds = db.Column(db.Integer, nullable=True)
+    current_status = db.Column(db.String(50), nullable=False, default='Aberto', index=True)
+    status_since = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    time_in_status = db.Column(db.JSON, nullable=False, default=dict) # {status: segundos} dos períodos encerrados
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class ValidationRequest(db.Model):
+    """Pedido de validação (interação 'request_validation') com estado em colunas indexadas.
+
+    Espelha `interaction_data['validation_status']` para que a fila de quem valida e
+    os pedidos vencidos sejam buscas por faixa de índice (services/validation_service.py).
+    """
+    __table_args__ = (
+        db.Index('ix_validation_request_queue', 'approver_email', 'status', 'deadline'),
+        db.Index('ix_validation_request_overdue', 'status', 'deadline'),
+        db.Index('ix_validation_request_requester', 'requester_email', 'status', 'created_at'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    interaction_id = db.Column(db.Integer, db.ForeignKey('interaction.id'), nullable=False, unique=True)
+    ticket_id = db.Column(db.Integer, db.ForeignKey('ticket.id'), nullable=False, index=True)
+    project_stage_id = db.Column(db.Integer, db.ForeignKey('project_stage.id'), nullable=True)
+    requester_email = db.Column(db.String(120), nullable=False)
+    approver_email = db.Column(db.String(120), nullable=False) # dono do chamado, quem aprova ou rejeita
+    status = db.Column(db.String(20), nullable=False, default='pending') # pending, approved, rejected, completed, canceled
+    deadline = db.Column(db.DateTime, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    resolved_at = db.Column(db.DateTime, nullable=True)
+    resolved_by = db.Column(db.String(120), nullable=True)
+
+    interaction = db.relationship('Interaction', backref=db.backref('validation_request', uselist=False,
+                                                                   cascade="all, delete-orphan"))
+    stage = db.relationship('ProjectStage')
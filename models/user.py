@@ -1,13 +1,20 @@
 from config import db, auth
+from instrumentation import tracked
+import authz
+
+@tracked('external', 'firebase.get_user_data')
+def fetch_user_data(uid, token):
+    """Dados do usuário; None se o registro não existe. Falhas de leitura propagam a exceção."""
+    return db.child("users").child(uid).get(token=token).val()
 
 def get_user_data(uid, token):
     try:
-        user_data = db.child("users").child(uid).get(token=token)
-        return user_data.val()
+        return fetch_user_data(uid, token)
     except Exception as e:
         print(f"Erro ao buscar dados do usuário {uid}: {e}")
         return None
 
+@tracked('external', 'firebase.get_all_users')
 def get_all_users(token):
     try:
         users = db.child("users").get(token=token)
@@ -16,6 +23,7 @@ def get_all_users(token):
         print(f"Erro ao buscar todos os usuários: {e}")
         return {}
 
+@tracked('external', 'firebase.create_user_with_data')
 def create_user_with_data(email, password, roles, admin_token, **kwargs):
     try:
         user = auth.create_user_with_email_and_password(email, password)
@@ -36,12 +44,14 @@ def create_user_with_data(email, password, roles, admin_token, **kwargs):
     except Exception as e:
         raise e
 
+@tracked('external', 'firebase.update_user_data')
 def update_user_data(uid, data, token):
     try:
         if 'roles' in data:
             data['roles'] = {role: True for role in data['roles']}
             
         db.child("users").child(uid).update(data, token=token)
+        authz.invalidate(uid)
         return True
     except Exception as e:
         print(f"Erro ao atualizar os dados do usuário {uid}: {e}")
@@ -3,6 +3,8 @@ from config import auth
 from models.user import get_user_data
 from decorators import login_required
 from datetime import datetime, timedelta
+from instrumentation import track
+import authz
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -17,11 +19,13 @@ def login():
         email = request.form.get('email')
         password = request.form.get('password')
         try:
-            user_auth_data = auth.sign_in_with_email_and_password(email, password)
+            with track('external', 'firebase.sign_in'):
+                user_auth_data = auth.sign_in_with_email_and_password(email, password)
             uid = user_auth_data['localId']
             id_token = user_auth_data['idToken']
             
             user_db_data = get_user_data(uid, id_token)
+            authz.remember(uid, user_db_data)
             
             expires_in = int(user_auth_data.get('expiresIn', 3600))
             expires_at = datetime.utcnow() + timedelta(seconds=expires_in)
@@ -32,6 +36,7 @@ def login():
                 'idToken': id_token,
                 'refreshToken': user_auth_data['refreshToken'], 
                 'roles': user_db_data.get('roles', {}) if user_db_data else {},
+                'codigo_vendedor': user_db_data.get('codigo_vendedor', '') if user_db_data else '',
                 'expires_at': expires_at.isoformat() # Armazena como string ISO
             }
             return redirect(url_for('main.home'))
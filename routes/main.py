@@ -1,11 +1,15 @@
-from flask import Blueprint, render_template, redirect, url_for, request, flash
+from flask import Blueprint, render_template, redirect, url_for, request, flash, session, abort
 from decorators import login_required, roles_required
-from services.commercial_service import calculate_commercial_kpis
+import authz
 from datetime import date
 from dateutil.relativedelta import relativedelta
 
 main_bp = Blueprint('main', __name__)
 
+# Os serviços de indicadores dependem de pandas/pyarrow e são importados dentro
+# das views: o custo da importação fica para o primeiro acesso aos painéis, e não
+# para o boot de cada worker.
+
 @main_bp.route('/home')
 @login_required
 def home():
@@ -27,6 +31,7 @@ def comercial_geral():
     start_date_str = request.args.get('start_date', default=first_day_prev_month.strftime('%Y-%m-%d'))
     end_date_str = request.args.get('end_date', default=last_day_prev_month.strftime('%Y-%m-%d'))
 
+    from services.commercial_service import calculate_commercial_kpis
     kpis, chart_data, error = calculate_commercial_kpis(start_date_str, end_date_str)
 
     if error:
@@ -39,22 +44,131 @@ def comercial_geral():
                            end_date=end_date_str)
 
 
+@main_bp.route('/setor/comercial/export')
+@roles_required(allowed_roles=['admin', 'comercial', 'diretoria'])
+def comercial_export():
+    from services import commercial_service, export_service
+    kind = request.args.get('kind', 'diario')
+    export_format = request.args.get('format', 'csv')
+    if kind not in commercial_service.EXPORT_KINDS or export_format not in export_service.EXPORT_FORMATS:
+        abort(400)
+
+    schema, tables, error = commercial_service.commercial_export_tables(
+        kind, request.args.get('start_date'), request.args.get('end_date'),
+        batch_size=export_service.BATCH_SIZE
+    )
+    if error:
+        flash(error, "danger")
+        return redirect(url_for('main.comercial_geral', start_date=request.args.get('start_date'),
+                                end_date=request.args.get('end_date')))
+    return export_service.export_response(tables, export_format, f'comercial_{kind}', schema=schema)
+
+
 @main_bp.route('/setor/comercial/conversao')
 @roles_required(allowed_roles=['admin', 'comercial', 'diretoria'])
 def comercial_conversao():
-    return render_template('setores/comercial/conversao.html')
+    from services import conversion_service
+    can_see_all = authz.has_any_role('admin', 'diretoria')
+
+    today = date.today()
+    default_start = (today.replace(day=1) - relativedelta(months=5)).strftime('%Y-%m')
+    start_period = request.args.get('start_period', default=default_start)
+    end_period = request.args.get('end_period', default=today.strftime('%Y-%m'))
+
+    conversion, error = {}, None
+    if can_see_all:
+        conversion, error = conversion_service.calculate_conversion(start_period, end_period)
+    else:
+        codigo_vendedor = session['user'].get('codigo_vendedor')
+        if codigo_vendedor:
+            conversion, error = conversion_service.calculate_conversion(
+                start_period, end_period, codigo_vendedor=str(codigo_vendedor)
+            )
+        else:
+            error = 'Seu usuário não possui código de vendedor vinculado.'
+
+    if error:
+        flash(error, "danger")
+
+    return render_template('setores/comercial/conversao.html',
+                           conversion=conversion,
+                           start_period=start_period,
+                           end_period=end_period,
+                           can_see_all=can_see_all)
 
 @main_bp.route('/setor/comercial/cancelamentos')
 @roles_required(allowed_roles=['admin', 'comercial', 'diretoria'])
 def comercial_cancelamentos():
     return render_template('setores/comercial/cancelamentos.html')
 
-@main_bp.route('/setor/comercial/metas')
+@main_bp.route('/setor/comercial/metas', methods=['GET', 'POST'])
 @roles_required(allowed_roles=['admin', 'comercial', 'diretoria'])
 def comercial_metas():
-    return render_template('setores/comercial/metas.html')
+    from services import goals_service
+    can_see_ranking = authz.has_any_role('admin', 'diretoria')
+    period = request.args.get('period', default=goals_service.current_period())
+
+    if request.method == 'POST':
+        if not can_see_ranking:
+            flash('Você não tem permissão para alterar metas.', 'danger')
+            return redirect(url_for('main.comercial_metas', period=period))
+
+        codigo_vendedor = (request.form.get('codigo_vendedor') or '').strip()
+        period = request.form.get('period') or period
+        if not codigo_vendedor:
+            flash('O código do vendedor é obrigatório.', 'danger')
+        else:
+            try:
+                goals_service.save_seller_goal(
+                    codigo_vendedor, period,
+                    request.form.get('meta_valor'),
+                    request.form.get('meta_peso'),
+                    session['user']['email']
+                )
+                flash(f'Meta do vendedor {codigo_vendedor} salva com sucesso!', 'success')
+            except ValueError:
+                flash('Valores de meta ou período inválidos.', 'danger')
+        return redirect(url_for('main.comercial_metas', period=period))
+
+    own_row = None
+    ranking = []
+    error = None
+    if can_see_ranking:
+        ranking, error = goals_service.calculate_seller_goals(period)
+    else:
+        codigo_vendedor = session['user'].get('codigo_vendedor')
+        if codigo_vendedor:
+            rows, error = goals_service.calculate_seller_goals(period, codigo_vendedor=str(codigo_vendedor))
+            own_row = rows[0] if rows else None
+        else:
+            error = 'Seu usuário não possui código de vendedor vinculado.'
+
+    if error:
+        flash(error, "danger")
+
+    return render_template('setores/comercial/metas.html',
+                           period=period,
+                           own_row=own_row,
+                           ranking=ranking,
+                           can_see_ranking=can_see_ranking)
 
 @main_bp.route('/setor/financeiro')
 @roles_required(allowed_roles=['admin', 'financeiro', 'diretoria'])
 def setor_financeiro():
-    return render_template('setores/financeiro.html')
\ No newline at end of file
+    today = date.today()
+    first_day_year = today.replace(month=1, day=1)
+
+    start_date_str = request.args.get('start_date', default=first_day_year.strftime('%Y-%m-%d'))
+    end_date_str = request.args.get('end_date', default=today.strftime('%Y-%m-%d'))
+
+    from services.financial_service import calculate_financial_kpis
+    kpis, chart_data, error = calculate_financial_kpis(start_date_str, end_date_str)
+
+    if error:
+        flash(error, "danger")
+
+    return render_template('setores/financeiro.html',
+                           kpis=kpis,
+                           chart_data=chart_data,
+                           start_date=start_date_str,
+                           end_date=end_date_str)
\ No newline at end of file
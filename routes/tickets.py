@@ -1,42 +1,41 @@
-from flask import Blueprint, render_template, request, redirect, url_for, session, flash, send_from_directory
-from decorators import login_required
-from models.ticket import Attachment
+from flask import Blueprint, render_template, request, redirect, url_for, session, flash, send_from_directory, send_file, jsonify, abort, Response, current_app
+from decorators import login_required, admin_required
+import authz
+from models.ticket import db, Attachment
 from models.user import get_all_users
-from services import ticket_service
+from services import ticket_service, sla_service, export_service, archive_service, events, validation_service
 from datetime import datetime
+import gzip
 import os
 
 tickets_bp = Blueprint('tickets', __name__, url_prefix='/tickets')
 
-@tickets_bp.route('/')
-@login_required
-def list_tickets():
-    user_roles = session['user'].get('roles', {})
-    is_admin = 'admin' in user_roles
-
-    filter_options = {
-        'statuses': ['Aberto', 'Em Andamento', 'Aguardando Resposta', 'Fechado'],
-        'urgencies': ['Baixa', 'Média', 'Alta', 'Crítica'],
-        'sectors': ['TI', 'Financeiro', 'Comercial', 'RH', 'Operacional']
-    }
+FILTER_OPTIONS = {
+    'statuses': ['Aberto', 'Em Andamento', 'Aguardando Resposta', 'Fechado'],
+    'urgencies': ['Baixa', 'Média', 'Alta', 'Crítica'],
+    'sectors': ['TI', 'Financeiro', 'Comercial', 'RH', 'Operacional']
+}
 
+def _list_filters_and_sorting():
+    """Lê da query string os filtros e a ordenação da lista de chamados."""
     statuses = request.args.getlist('status')
     if not statuses and 'status' not in request.args:
         statuses = ['Aberto', 'Em Andamento', 'Aguardando Resposta']
 
     urgencies = request.args.getlist('urgency')
     if not urgencies and 'urgency' not in request.args:
-        urgencies = list(filter_options['urgencies'])
+        urgencies = list(FILTER_OPTIONS['urgencies'])
 
     sectors = request.args.getlist('sector')
     if not sectors and 'sector' not in request.args:
-        sectors = list(filter_options['sectors'])
+        sectors = list(FILTER_OPTIONS['sectors'])
 
     filters = {
         'status': statuses,
         'urgency': urgencies,
         'sector': sectors,
-        'title': request.args.get('title', '')
+        'title': request.args.get('title', ''),
+        'pending_validation': request.args.get('pending_validation') == '1'
     }
     filters = {k: v for k, v in filters.items() if v}
 
@@ -44,6 +43,13 @@ def list_tickets():
         'by': request.args.get('sort_by', 'created_at'),
         'order': request.args.get('order', 'desc')
     }
+    return filters, sorting
+
+@tickets_bp.route('/')
+@login_required
+def list_tickets():
+    is_admin = authz.is_admin()
+    filters, sorting = _list_filters_and_sorting()
 
     if is_admin:
         tickets = ticket_service.get_all_tickets(filters=filters, sorting=sorting)
@@ -54,10 +60,76 @@ def list_tickets():
     return render_template('tickets/list.html',
                            tickets=tickets,
                            is_admin=is_admin,
-                           filter_options=filter_options,
+                           filter_options=FILTER_OPTIONS,
                            current_filters=filters,
                            current_sorting=sorting)
 
+@tickets_bp.route('/export')
+@login_required
+def export_tickets():
+    """Exporta os chamados da lista (mesmos filtros e ordenação) em CSV ou Parquet, em streaming."""
+    export_format = request.args.get('format', 'csv')
+    if export_format not in export_service.EXPORT_FORMATS:
+        abort(400)
+
+    filters, sorting = _list_filters_and_sorting()
+    user_email = None if authz.is_admin() else session['user']['email']
+
+    schema, tables = export_service.rows_to_tables(
+        ticket_service.TICKET_EXPORT_COLUMNS,
+        ticket_service.iter_ticket_export_rows(filters, sorting, user_email=user_email,
+                                               batch_size=export_service.BATCH_SIZE)
+    )
+    return export_service.export_response(tables, export_format, 'chamados', schema=schema)
+
+@tickets_bp.route('/sla')
+@admin_required
+def sla_dashboard():
+    metrics = sla_service.get_sla_dashboard()
+    return render_template('tickets/sla.html', metrics=metrics)
+
+@tickets_bp.route('/validations')
+@login_required
+def my_validations():
+    user_email = session['user']['email']
+    is_admin = authz.is_admin()
+    now = datetime.utcnow()
+    return render_template('tickets/validations.html',
+                           awaiting_me=validation_service.get_pending_for_approver(user_email),
+                           requested_by_me=validation_service.get_pending_requested_by(user_email),
+                           overdue=validation_service.get_overdue(now) if is_admin else [],
+                           is_admin=is_admin,
+                           now=now)
+
+@tickets_bp.route('/bulk', methods=['POST'])
+@admin_required
+def bulk_update():
+    ticket_ids = [t for t in request.form.getlist('ticket_ids') if t.isdigit()]
+    new_status = request.form.get('bulk_status') or None
+    new_assignee = request.form.get('bulk_assignee')
+    if request.form.get('bulk_action') == 'close':
+        new_status = 'Fechado'
+    if request.form.get('bulk_unassign'):
+        new_assignee = ''
+    elif not new_assignee:
+        new_assignee = None
+
+    if not ticket_ids:
+        flash('Selecione ao menos um chamado.', 'warning')
+    elif not new_status and new_assignee is None:
+        flash('Escolha um novo status ou responsável.', 'warning')
+    else:
+        results = ticket_service.bulk_update_tickets(
+            ticket_ids, session['user']['email'], new_status=new_status, new_assignee=new_assignee
+        )
+        labels = {'updated': 'Atualizados', 'unchanged': 'Sem alteração', 'not_found': 'Não encontrados'}
+        for result, label in labels.items():
+            ids = [f'#{ticket_id}' for ticket_id, r in results.items() if r == result]
+            if ids:
+                flash(f"{label} ({len(ids)}): {', '.join(ids)}", 'success' if result == 'updated' else 'info')
+
+    return redirect(request.referrer or url_for('tickets.list_tickets'))
+
 @tickets_bp.route('/new', methods=['GET', 'POST'])
 @login_required
 def create_ticket():
@@ -93,13 +165,14 @@ def create_ticket():
 @tickets_bp.route('/<int:ticket_id>', methods=['GET', 'POST'])
 @login_required
 def view_ticket(ticket_id):
-    user_roles = session['user'].get('roles', {})
-    is_admin = 'admin' in user_roles
+    is_admin = authz.is_admin()
     user_email = session['user']['email']
     
     ticket = ticket_service.get_ticket_by_id(ticket_id)
+    if not ticket:
+        return _view_archived_ticket(ticket_id, is_admin, user_email)
 
-    if not ticket or (ticket.user_email != user_email and not is_admin):
+    if ticket.user_email != user_email and not is_admin:
         flash('Chamado não encontrado ou você não tem permissão para visualizá-lo.', 'danger')
         return redirect(url_for('tickets.list_tickets'))
 
@@ -179,11 +252,7 @@ def view_ticket(ticket_id):
         return redirect(url_for('tickets.view_ticket', ticket_id=ticket_id))
     
     stage_filter = request.args.get('stage_filter')
-    interactions = ticket.interactions
-    if stage_filter and stage_filter.isdigit():
-        interactions = [i for i in ticket.interactions if i.project_stage_id == int(stage_filter)]
-    elif stage_filter == 'geral':
-        interactions = [i for i in ticket.interactions if i.project_stage_id is None]
+    interactions, next_before = ticket_service.get_interactions_page(ticket_id, stage_filter=stage_filter)
 
     return render_template('tickets/view.html', 
                            ticket=ticket, 
@@ -191,15 +260,118 @@ def view_ticket(ticket_id):
                            all_users=all_users, 
                            now=datetime.now(),
                            interactions=interactions,
+                           next_before=next_before,
                            stage_filter=stage_filter)
 
+def _view_archived_ticket(ticket_id, is_admin, user_email):
+    """Exibe, somente para leitura, um chamado que já foi movido para o arquivo."""
+    archived = archive_service.get_archived_ticket(ticket_id)
+    if not archived or (archived.user_email != user_email and not is_admin):
+        flash('Chamado não encontrado ou você não tem permissão para visualizá-lo.', 'danger')
+        return redirect(url_for('tickets.list_tickets'))
+
+    if request.method == 'POST':
+        flash('Este chamado está arquivado e não pode ser alterado.', 'warning')
+        return redirect(url_for('tickets.view_ticket', ticket_id=ticket_id))
+
+    stage_filter = request.args.get('stage_filter')
+    ticket, interactions = archive_service.archived_ticket_view(archived, stage_filter=stage_filter)
+    return render_template('tickets/archived_view.html',
+                           ticket=ticket,
+                           is_admin=is_admin,
+                           interactions=interactions,
+                           stage_filter=stage_filter)
+
+@tickets_bp.route('/archive')
+@login_required
+def archived_tickets():
+    title = request.args.get('title', '')
+    sector = request.args.get('sector', '')
+    tickets = archive_service.search_archived_tickets(
+        title=title,
+        sector=sector,
+        user_email=None if authz.is_admin() else session['user']['email']
+    )
+    return render_template('tickets/archive_list.html',
+                           tickets=tickets,
+                           title=title,
+                           sector=sector,
+                           sectors=FILTER_OPTIONS['sectors'])
+
+@tickets_bp.route('/<int:ticket_id>/interactions')
+@login_required
+def ticket_interactions(ticket_id):
+    """Página de interações anteriores, já renderizadas, para o botão "Carregar anteriores"."""
+    is_admin = authz.is_admin()
+    user_email = session['user']['email']
+
+    ticket = ticket_service.get_ticket_by_id(ticket_id)
+    if not ticket or (ticket.user_email != user_email and not is_admin):
+        abort(404)
+
+    since = request.args.get('since', type=int)
+    interactions, next_before = ticket_service.get_interactions_page(
+        ticket_id,
+        stage_filter=request.args.get('stage_filter'),
+        before=request.args.get('before', type=int),
+        since=since
+    )
+    html = render_template('tickets/components/_interaction_page.html',
+                           ticket=ticket, is_admin=is_admin, interactions=interactions)
+    if not since:
+        return jsonify(html=html, next_before=next_before)
+
+    # Atualização ao vivo: também os detalhes do chamado, que podem ter mudado
+    details = render_template('tickets/components/_ticket_details.html', ticket=ticket)
+    return jsonify(html=html, details=details, version=ticket.version)
+
+@tickets_bp.route('/<int:ticket_id>/row')
+@login_required
+def ticket_row(ticket_id):
+    """Linha da lista de chamados, para atualizar a lista aberta sem recarregar a página."""
+    is_admin = authz.is_admin()
+    ticket = ticket_service.get_ticket_by_id(ticket_id)
+    if not ticket or (ticket.user_email != session['user']['email'] and not is_admin):
+        abort(404)
+    return render_template('tickets/components/_ticket_row.html', ticket=ticket, is_admin=is_admin)
+
+@tickets_bp.route('/events')
+@login_required
+def ticket_events():
+    """Stream (server-sent events) de alterações nos chamados exibidos na página.
+
+    `watch` lista os chamados acompanhados como `id:versão` separados por vírgula;
+    com `new=1`, avisa também da criação de chamados.
+    """
+    watched = {}
+    for item in request.args.get('watch', '').split(','):
+        ticket_id, _, version = item.partition(':')
+        if ticket_id.isdigit() and version.isdigit():
+            watched[int(ticket_id)] = int(version)
+
+    owner = None if authz.is_admin() else session['user']['email']
+    if owner is not None and watched:
+        owned = ticket_service.get_owned_ticket_ids(watched, owner)
+        watched = {ticket_id: version for ticket_id, version in watched.items() if ticket_id in owned}
+
+    watch_new = request.args.get('new') == '1'
+    subscription = events.Subscription(
+        watched, watch_new=watch_new, owner=owner,
+        max_id=events.current_max_ticket_id() if watch_new else 0
+    )
+    # A conexão com o banco não fica presa durante o stream
+    db.session.close()
+    headers = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    if events.broker.subscribe(subscription, app=current_app._get_current_object()) is None:
+        return Response(events.refused_stream(), mimetype='text/event-stream', headers=headers)
+    return Response(events.stream(subscription), mimetype='text/event-stream', headers=headers)
+
 @tickets_bp.route('/download/attachment/<int:attachment_id>')
 @login_required
 def download_file(attachment_id):
     attachment = Attachment.query.get_or_404(attachment_id)
     
-    user_roles = session['user'].get('roles', {})
-    is_admin = 'admin' in user_roles
+    is_admin = authz.is_admin()
     user_email = session['user']['email']
     
     ticket = attachment.ticket or (attachment.interaction.ticket if attachment.interaction else None)
@@ -211,4 +383,18 @@ def download_file(attachment_id):
     directory = os.path.dirname(attachment.filepath)
     filename = os.path.basename(attachment.filepath)
     
-    return send_from_directory(directory, filename, as_attachment=False)
\ No newline at end of file
+    return send_from_directory(directory, filename, as_attachment=False)
+
+@tickets_bp.route('/archive/attachment/<int:attachment_id>')
+@login_required
+def download_archived_file(attachment_id):
+    attachment = archive_service.get_archived_attachment(attachment_id)
+    if not attachment or not attachment.filepath or not os.path.isfile(attachment.filepath):
+        abort(404)
+
+    archived = archive_service.get_archived_ticket(attachment.ticket_id)
+    if archived.user_email != session['user']['email'] and not authz.is_admin():
+        flash('Você não tem permissão para acessar este arquivo.', 'danger')
+        return redirect(url_for('tickets.list_tickets'))
+
+    return send_file(gzip.open(attachment.filepath, 'rb'), download_name=attachment.filename, as_attachment=False)
@@ -0,0 +1,78 @@
+"""Criação e atualização do esquema do banco (`flask init-db`).
+
+O projeto não usa migrações: `create_schema()` cria as tabelas que ainda não
+existem e `upgrade_schema()`, além disso, compara cada tabela existente com os
+modelos e adiciona as colunas e os índices que faltam (ALTER TABLE ... ADD
+COLUMN / CREATE INDEX). Rodar de novo não altera nada. Colunas removidas ou com
+tipo alterado não são tratadas.
+
+Quando a atualização cria tabelas ou colunas que guardam valores derivados
+(resumos de SLA, resumo dos chamados, pedidos de validação), os dados são
+preenchidos a partir do histórico em seguida.
+"""
+from sqlalchemy import inspect
+from sqlalchemy.schema import CreateColumn
+from models.ticket import db
+
+
+def _import_models():
+    """Registra no metadata os modelos que não são importados pelas rotas na inicialização."""
+    import models.ticket  # noqa: F401
+    import models.goal  # noqa: F401 - SellerGoal
+    import models.archive  # noqa: F401 - ArchivedTicket, ArchivedAttachment
+    import models.access  # noqa: F401 - UserAccessVersion
+
+
+def create_schema():
+    """Cria as tabelas que ainda não existem (sem alterar as existentes)."""
+    _import_models()
+    db.create_all()
+
+
+def _add_column(connection, table, column):
+    if not column.nullable and column.server_default is None:
+        raise RuntimeError(f'{table.name}.{column.name} é NOT NULL sem server_default; adicione manualmente.')
+    preparer = connection.dialect.identifier_preparer
+    column_sql = CreateColumn(column).compile(dialect=connection.dialect)
+    connection.exec_driver_sql(f'ALTER TABLE {preparer.format_table(table)} ADD COLUMN {column_sql}')
+
+
+def upgrade_schema():
+    """Cria tabelas e adiciona colunas e índices ausentes; retorna a lista do que foi feito."""
+    _import_models()
+    inspector = inspect(db.engine)
+    existing_tables = set(inspector.get_table_names())
+
+    changes = []
+    with db.engine.begin() as connection:
+        for table in db.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            columns = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in columns:
+                    _add_column(connection, table, column)
+                    changes.append(f'coluna {table.name}.{column.name}')
+            indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in indexes:
+                    index.create(connection)
+                    changes.append(f'índice {index.name}')
+
+    new_tables = [table.name for table in db.metadata.sorted_tables if table.name not in existing_tables]
+    db.create_all()
+    changes.extend(f'tabela {name}' for name in new_tables)
+
+    if 'ticket_sla' in new_tables and 'ticket' in existing_tables:
+        from services.sla_service import rebuild_sla_summaries
+        count = rebuild_sla_summaries()
+        changes.append(f'{count} resumos de SLA recalculados')
+    if 'validation_request' in new_tables and 'interaction' in existing_tables:
+        from services.validation_service import backfill_validation_requests
+        count = backfill_validation_requests()
+        changes.append(f'{count} pedidos de validação registrados')
+    if any(change.startswith('coluna ticket.') for change in changes) or 'validation_request' in new_tables:
+        from services.ticket_summary import repair_summaries
+        count = repair_summaries()
+        changes.append(f'{count} resumos de chamados recalculados')
+    return changes
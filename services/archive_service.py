@@ -0,0 +1,295 @@
+"""Arquivamento de chamados fechados há muito tempo.
+
+Chamados com status 'Fechado' há mais de ARCHIVE_AFTER_DAYS dias saem das
+tabelas principais (Ticket, Interaction, Attachment, ProjectStage, TicketSla,
+ValidationRequest) e passam para `ArchivedTicket`: as colunas usadas na busca
+ficam em colunas próprias e o restante (etapas, interações com respostas e
+anexos) num snapshot JSON. Os arquivos de anexo são compactados com gzip em ARCHIVE_FOLDER e
+registrados em `ArchivedAttachment`. Chamados arquivados continuam visíveis,
+somente para leitura, na mesma rota `tickets.view_ticket`.
+"""
+import os
+import gzip
+import shutil
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import selectinload
+from models.ticket import db, Ticket, Interaction, Attachment, ProjectStage, TicketSla
+from models.archive import ArchivedTicket, ArchivedAttachment
+
+ARCHIVE_AFTER_DAYS = int(os.getenv('TICKET_ARCHIVE_DAYS', 365))
+ARCHIVE_FOLDER = 'uploads/archive'
+ARCHIVE_SEARCH_LIMIT = 200
+
+CLOSED_STATUS = 'Fechado'
+
+
+def _isoformat(value):
+    return value.isoformat() if value else None
+
+
+def _parse_datetime(value):
+    return datetime.fromisoformat(value) if value else None
+
+
+def _attachment_payload(attachment):
+    return {'id': attachment.id, 'filename': attachment.filename}
+
+
+def _interaction_payload(interaction):
+    return {
+        'id': interaction.id,
+        'user_email': interaction.user_email,
+        'timestamp': _isoformat(interaction.timestamp),
+        'action_type': interaction.action_type,
+        'text': interaction.text,
+        'interaction_data': interaction.interaction_data,
+        'deadline': _isoformat(interaction.deadline),
+        'project_stage_id': interaction.project_stage_id,
+        'attachments': [_attachment_payload(a) for a in interaction.attachments],
+        'children': [_interaction_payload(c) for c in sorted(interaction.children, key=lambda c: c.id)],
+    }
+
+
+def _ticket_payload(ticket, interactions):
+    sla = ticket.sla
+    return {
+        'description': ticket.description,
+        'deadline': _isoformat(ticket.deadline),
+        'attachments': [_attachment_payload(a) for a in ticket.attachments
+                        if a.interaction_id is None and a.project_stage_id is None],
+        'stages': [{
+            'id': stage.id,
+            'name': stage.name,
+            'deadline': _isoformat(stage.deadline),
+            'status': stage.status,
+            'attachments': [_attachment_payload(a) for a in stage.attachments],
+        } for stage in sorted(ticket.project_stages, key=lambda s: s.id)],
+        'interactions': [_interaction_payload(i) for i in interactions],
+        'sla': {
+            'first_response_at': _isoformat(sla.first_response_at),
+            'first_response_seconds': sla.first_response_seconds,
+            'time_in_status': sla.time_in_status,
+        } if sla else None,
+    }
+
+
+def _compress_file(source, destination):
+    """Compacta `source` em `destination`; retorna (tamanho original, tamanho compactado)."""
+    with open(source, 'rb') as src, gzip.open(destination, 'wb', compresslevel=6) as dst:
+        shutil.copyfileobj(src, dst)
+    return os.path.getsize(source), os.path.getsize(destination)
+
+
+def _archive_ticket(ticket, archived_at, written_files):
+    """Cria os registros de arquivo de um chamado e compacta seus anexos (sem commit)."""
+    interactions = (Interaction.query
+                    .filter(Interaction.ticket_id == ticket.id, Interaction.parent_id.is_(None))
+                    .options(selectinload(Interaction.children), selectinload(Interaction.attachments))
+                    .order_by(Interaction.timestamp, Interaction.id)
+                    .all())
+    closed_at = ticket.sla.status_since if ticket.sla else None
+
+    db.session.add(ArchivedTicket(
+        id=ticket.id,
+        title=ticket.title,
+        urgency=ticket.urgency,
+        sector=ticket.sector,
+        user_email=ticket.user_email,
+        assigned_user_email=ticket.assigned_user_email,
+        ticket_type=ticket.ticket_type,
+        status=ticket.status,
+        created_at=ticket.created_at,
+        closed_at=closed_at,
+        archived_at=archived_at,
+        payload=_ticket_payload(ticket, interactions),
+    ))
+    db.session.flush()
+
+    source_files = []
+    for attachment in ticket.attachments:
+        filepath, original_size, compressed_size = None, None, None
+        if attachment.filepath and os.path.isfile(attachment.filepath):
+            filepath = os.path.join(ARCHIVE_FOLDER, os.path.basename(attachment.filepath) + '.gz')
+            original_size, compressed_size = _compress_file(attachment.filepath, filepath)
+            written_files.append(filepath)
+            source_files.append(attachment.filepath)
+        db.session.add(ArchivedAttachment(
+            id=attachment.id,
+            ticket_id=ticket.id,
+            filename=attachment.filename,
+            filepath=filepath,
+            original_size=original_size,
+            compressed_size=compressed_size,
+        ))
+
+    db.session.delete(ticket)
+    return source_files
+
+
+def _pinned_ticket_ids():
+    """Chamados que não podem sair das tabelas principais num SQLite antigo.
+
+    Tabelas do SQLite criadas sem AUTOINCREMENT reutilizam o maior id depois que
+    a linha é apagada, e o próximo chamado (ou interação, anexo, etapa) receberia
+    o id de um registro arquivado. Nesses bancos o chamado dono do maior id de
+    cada tabela fica nas tabelas principais até deixar de ser o último.
+    """
+    if db.engine.dialect.name != 'sqlite':
+        return set()
+    pinned = set()
+    for model, ticket_column in ((Ticket, Ticket.id), (Interaction, Interaction.ticket_id),
+                                 (Attachment, Attachment.ticket_id), (ProjectStage, ProjectStage.ticket_id)):
+        table_sql = db.session.execute(
+            text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {'name': model.__tablename__}
+        ).scalar()
+        if table_sql and 'AUTOINCREMENT' in table_sql.upper():
+            continue
+        ticket_id = db.session.execute(select(ticket_column).order_by(model.id.desc()).limit(1)).scalar()
+        if ticket_id is not None:
+            pinned.add(ticket_id)
+    return pinned
+
+
+def archive_closed_tickets(days=None, batch_size=100):
+    """Arquiva os chamados fechados há mais de `days` dias; retorna quantos foram arquivados.
+
+    Cada lote é gravado numa transação: os registros de arquivo são inseridos e
+    os chamados removidos juntos. Os arquivos originais só são apagados depois
+    do commit; se o lote falhar, as cópias compactadas são descartadas.
+    """
+    days = ARCHIVE_AFTER_DAYS if days is None else days
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    closed_since = func.coalesce(TicketSla.status_since, Ticket.created_at)
+    os.makedirs(ARCHIVE_FOLDER, exist_ok=True)
+
+    pinned = _pinned_ticket_ids()
+    archived = 0
+    last_id = 0
+    while True:
+        ticket_ids = db.session.execute(
+            select(Ticket.id)
+            .outerjoin(TicketSla, TicketSla.ticket_id == Ticket.id)
+            .where(Ticket.status == CLOSED_STATUS, closed_since < cutoff, Ticket.id > last_id)
+            .order_by(Ticket.id)
+            .limit(batch_size)
+        ).scalars().all()
+        if not ticket_ids:
+            break
+        last_id = ticket_ids[-1]
+        ticket_ids = [ticket_id for ticket_id in ticket_ids if ticket_id not in pinned]
+        if not ticket_ids:
+            continue
+
+        tickets = (Ticket.query
+                   .filter(Ticket.id.in_(ticket_ids))
+                   .options(selectinload(Ticket.attachments), selectinload(Ticket.sla),
+                            selectinload(Ticket.project_stages).selectinload(ProjectStage.attachments))
+                   .all())
+        archived_at = datetime.utcnow()
+        written_files, source_files = [], []
+        try:
+            for ticket in tickets:
+                source_files.extend(_archive_ticket(ticket, archived_at, written_files))
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            for filepath in written_files:
+                if os.path.exists(filepath):
+                    os.remove(filepath)
+            raise
+
+        for filepath in source_files:
+            try:
+                os.remove(filepath)
+            except OSError:
+                pass
+        archived += len(tickets)
+        db.session.expunge_all()
+
+    return archived
+
+
+def get_archived_ticket(ticket_id):
+    """Busca um chamado arquivado pelo ID original."""
+    return db.session.get(ArchivedTicket, ticket_id)
+
+
+def get_archived_attachment(attachment_id):
+    return db.session.get(ArchivedAttachment, attachment_id)
+
+
+def search_archived_tickets(title=None, sector=None, user_email=None, limit=ARCHIVE_SEARCH_LIMIT):
+    """Busca no arquivo, dos fechados mais recentes para os mais antigos.
+
+    `user_email` restringe aos chamados abertos pelo usuário (não administradores).
+    """
+    query = ArchivedTicket.query
+    if title:
+        query = query.filter(ArchivedTicket.title.ilike(f'%{title}%'))
+    if sector:
+        query = query.filter(ArchivedTicket.sector == sector)
+    if user_email:
+        query = query.filter(ArchivedTicket.user_email == user_email)
+    return query.order_by(ArchivedTicket.closed_at.desc(), ArchivedTicket.id.desc()).limit(limit).all()
+
+
+def _attachments_view(attachments):
+    return [SimpleNamespace(**a) for a in attachments]
+
+
+def _interaction_view(data, stages, ticket_id):
+    return SimpleNamespace(
+        id=data['id'],
+        ticket_id=ticket_id,
+        user_email=data['user_email'],
+        timestamp=_parse_datetime(data['timestamp']),
+        action_type=data['action_type'],
+        text=data['text'],
+        interaction_data=data['interaction_data'],
+        deadline=_parse_datetime(data['deadline']),
+        stage=stages.get(data['project_stage_id']),
+        attachments=_attachments_view(data['attachments']),
+        children=[_interaction_view(c, stages, ticket_id) for c in data['children']],
+    )
+
+
+def archived_ticket_view(archived, stage_filter=None):
+    """Reconstrói o chamado arquivado como objetos somente leitura para os templates.
+
+    Retorna (ticket, interações principais), no mesmo formato usado por
+    `tickets/view.html`.
+    """
+    payload = archived.payload
+    stages = {
+        s['id']: SimpleNamespace(id=s['id'], name=s['name'], status=s['status'],
+                                 deadline=_parse_datetime(s['deadline']),
+                                 attachments=_attachments_view(s['attachments']))
+        for s in payload.get('stages', [])
+    }
+    ticket = SimpleNamespace(
+        id=archived.id,
+        title=archived.title,
+        urgency=archived.urgency,
+        sector=archived.sector,
+        description=payload.get('description'),
+        user_email=archived.user_email,
+        assigned_user_email=archived.assigned_user_email,
+        ticket_type=archived.ticket_type,
+        status=archived.status,
+        created_at=archived.created_at,
+        closed_at=archived.closed_at,
+        archived_at=archived.archived_at,
+        deadline=_parse_datetime(payload.get('deadline')),
+        attachments=_attachments_view(payload.get('attachments', [])),
+        project_stages=list(stages.values()),
+    )
+
+    interactions = [_interaction_view(i, stages, archived.id) for i in payload.get('interactions', [])]
+    if stage_filter == 'geral':
+        interactions = [i for i in interactions if i.stage is None]
+    elif stage_filter and stage_filter.isdigit():
+        interactions = [i for i in interactions if i.stage is not None and i.stage.id == int(stage_filter)]
+    return ticket, interactions
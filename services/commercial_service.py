@@ -2,6 +2,8 @@ import pandas as pd
 from datetime import datetime, date
 from dateutil.relativedelta import relativedelta
 import os
+import pyarrow as pa
+from services.kpi_framework import register_dataset, evaluate_kpi, stream_group_sum, iter_dataset_batches
 
 def format_value(value, is_currency=True):
     if pd.isna(value) or value is None:
@@ -11,57 +13,71 @@ def format_value(value, is_currency=True):
     else:
         return f"{int(value):,}".replace(",", ".")
 
+def _merge_line_totals(df_head):
+    """Anexa ao cabeçalho os totais bruto/líquido das linhas de cada lançamento contábil."""
+    line_totals = stream_group_sum(
+        os.getenv('PARQUET_ANALISE_VENDA_LINE'), 'LctoContabil', ['TotalBruto', 'TotalLinha']
+    )
+    return pd.merge(df_head, line_totals, on='LctoContabil', how='left')
+
+register_dataset('venda_line', env='PARQUET_ANALISE_VENDA_LINE')
+register_dataset(
+    'venda_head',
+    env='PARQUET_ANALISE_VENDA_HEAD',
+    date_column='Data',
+    columns=['Data', 'TipoNs', 'ValorTotal', 'PesoTotal', 'DocNum', 'LctoContabil'],
+    prepare=_merge_line_totals,
+    depends_on=['venda_line'],
+)
+
+COMMERCIAL_SUMMARY = {
+    'dataset': 'venda_head',
+    'group_by': ['TipoNs'],
+    'measures': {
+        'Valor': ('ValorTotal', 'sum'),
+        'Peso': ('PesoTotal', 'sum'),
+        'Quantidade': ('DocNum', 'count'),
+    },
+}
+
+COMMERCIAL_DAILY = {
+    'dataset': 'venda_head',
+    'date_freq': 'D',
+    'exclude': {'TipoNs': ['ANULAÇÃO']},
+    'measures': {
+        'Faturamento': ('ValorTotal', 'sum'),
+        'Peso': ('PesoTotal', 'sum'),
+        'TotalBruto': ('TotalBruto', 'sum'),
+        'TotalLinha': ('TotalLinha', 'sum'),
+    },
+    'ratios': {
+        'Preco_por_kg': ('Faturamento', 'Peso', 1),
+        'Desconto_medio': ('TotalBruto - TotalLinha', 'TotalBruto', 100),
+    },
+}
+
+NET_REVENUE_TYPES = ['NOTA FISCAL DE SAÍDA', 'CANCELAMENTO', 'DEVOLUÇÃO']
+
 def calculate_commercial_kpis(start_date_str, end_date_str):
     kpis_data = {}
     chart_data = None
     error = None
-    path_head = os.getenv('PARQUET_ANALISE_VENDA_HEAD')
-    path_line = os.getenv('PARQUET_ANALISE_VENDA_LINE')
-
-    if not path_head or not path_line:
-        error = "Variáveis de ambiente 'PARQUET_ANALISE_VENDA_HEAD' e/ou 'PARQUET_ANALISE_VENDA_LINE' não definidas."
-        return kpis_data, chart_data, error
-    if not os.path.exists(path_head):
-        error = f"Arquivo de dados '{path_head}' não encontrado."
-        return kpis_data, chart_data, error
-    if not os.path.exists(path_line):
-        error = f"Arquivo de dados '{path_line}' não encontrado."
-        return kpis_data, chart_data, error
 
     try:
-        df_head = pd.read_parquet(path_head)
-        df_line = pd.read_parquet(path_line)
-        
-        df_head['Data'] = pd.to_datetime(df_head['Data'], errors='coerce')
-
         start_date = datetime.strptime(start_date_str, '%Y-%m-%d')
         end_date = datetime.strptime(end_date_str, '%Y-%m-%d')
 
-        mask = (df_head['Data'] >= start_date) & (df_head['Data'] <= end_date)
-        filtered_df_head = df_head.loc[mask].copy()
+        summary, error = evaluate_kpi(COMMERCIAL_SUMMARY, start_date, end_date)
+        if error:
+            return kpis_data, chart_data, error
 
-        if filtered_df_head.empty:
+        if summary.empty:
             return {}, None, "Nenhum dado encontrado para o período selecionado."
-        
-        summary = filtered_df_head.groupby('TipoNs').agg(
-            Valor=('ValorTotal', 'sum'),
-            Peso=('PesoTotal', 'sum'),
-            Quantidade=('DocNum', 'count')
-        ).reset_index()
-        
-        nf_saida_val = summary.loc[summary['TipoNs'] == 'NOTA FISCAL DE SAÍDA', 'Valor'].sum()
-        cancel_val = summary.loc[summary['TipoNs'] == 'CANCELAMENTO', 'Valor'].sum()
-        devolucao_val = summary.loc[summary['TipoNs'] == 'DEVOLUÇÃO', 'Valor'].sum()
-        net_revenue_valor = nf_saida_val + cancel_val + devolucao_val
-
-        nf_saida_peso = summary.loc[summary['TipoNs'] == 'NOTA FISCAL DE SAÍDA', 'Peso'].sum()
-        cancel_peso = summary.loc[summary['TipoNs'] == 'CANCELAMENTO', 'Peso'].sum()
-        devolucao_peso = summary.loc[summary['TipoNs'] == 'DEVOLUÇÃO', 'Peso'].sum()
-        nf_saida_qtd = summary.loc[summary['TipoNs'] == 'NOTA FISCAL DE SAÍDA', 'Quantidade'].sum()
-        cancel_qtd = summary.loc[summary['TipoNs'] == 'CANCELAMENTO', 'Quantidade'].sum()
-        devolucao_qtd = summary.loc[summary['TipoNs'] == 'DEVOLUÇÃO', 'Quantidade'].sum()
-        net_revenue_peso = nf_saida_peso + cancel_peso + devolucao_peso
-        net_revenue_qtd = nf_saida_qtd + cancel_qtd + devolucao_qtd
+
+        net_revenue = summary[summary['TipoNs'].isin(NET_REVENUE_TYPES)]
+        net_revenue_valor = net_revenue['Valor'].sum()
+        net_revenue_peso = net_revenue['Peso'].sum()
+        net_revenue_qtd = net_revenue['Quantidade'].sum()
 
         kpis_list = summary.to_dict('records')
         for kpi in kpis_list:
@@ -77,40 +93,11 @@ def calculate_commercial_kpis(start_date_str, end_date_str):
         })
         kpis_data = {item['TipoNs']: item for item in kpis_list}
 
-        line_totals = df_line.groupby('LctoContabil').agg(
-            TotalBruto=('TotalBruto', 'sum'),
-            TotalLinha=('TotalLinha', 'sum')
-        ).reset_index()
-
-        df_merged = pd.merge(
-            filtered_df_head,
-            line_totals,
-            on='LctoContabil',
-            how='left'
-        )
-
-        df_saida = df_merged[df_merged['TipoNs'] != 'ANULAÇÃO'].copy()
-
-        if not df_saida.empty:
-            df_saida.loc[:, 'Data'] = df_saida['Data'].dt.date
-            
-            daily_agg = df_saida.groupby('Data').agg(
-                Faturamento=('ValorTotal', 'sum'),
-                Peso=('PesoTotal', 'sum'),
-                TotalBruto=('TotalBruto', 'sum'),
-                TotalLinha=('TotalLinha', 'sum')
-            ).reset_index()
-
-            daily_agg = daily_agg.sort_values(by='Data')
-            
-            daily_agg['Preco_por_kg'] = daily_agg.apply(
-                lambda row: row['Faturamento'] / row['Peso'] if row['Peso'] > 0 else 0, axis=1
-            )
-            
-            daily_agg['Desconto_medio'] = daily_agg.apply(
-                lambda row: ((row['TotalBruto'] - row['TotalLinha']) / row['TotalBruto']) * 100 if row['TotalBruto'] > 0 else 0, axis=1
-            )
-            
+        daily_agg, error = evaluate_kpi(COMMERCIAL_DAILY, start_date, end_date)
+        if error:
+            return kpis_data, chart_data, error
+
+        if not daily_agg.empty:
             chart_data = {
                 'labels': [d.strftime('%d/%m') for d in daily_agg['Data']],
                 'faturamento_data': daily_agg['Faturamento'].tolist(),
@@ -122,4 +109,27 @@ def calculate_commercial_kpis(start_date_str, end_date_str):
     except Exception as e:
         error = f"Erro ao processar o arquivo de dados: \"{e}\""
 
-    return kpis_data, chart_data, error
\ No newline at end of file
+    return kpis_data, chart_data, error
+
+EXPORT_KINDS = ('diario', 'linhas')
+
+def commercial_export_tables(kind, start_date_str, end_date_str, batch_size=1000):
+    """Dados do painel comercial para exportação: (schema, tabelas pyarrow, error).
+
+    `diario` é a série diária dos KPIs (COMMERCIAL_DAILY); `linhas` são os
+    registros brutos de venda do período, lidos do Parquet em lotes.
+    """
+    try:
+        start_date = datetime.strptime(start_date_str, '%Y-%m-%d')
+        end_date = datetime.strptime(end_date_str, '%Y-%m-%d')
+    except (TypeError, ValueError):
+        return None, None, "Período inválido."
+
+    if kind == 'linhas':
+        return iter_dataset_batches('venda_head', start_date, end_date, batch_size=batch_size)
+
+    daily_agg, error = evaluate_kpi(COMMERCIAL_DAILY, start_date, end_date)
+    if error:
+        return None, None, error
+    table = pa.Table.from_pandas(daily_agg, preserve_index=False)
+    return table.schema, (pa.Table.from_batches([b]) for b in table.to_batches(max_chunksize=batch_size)), None
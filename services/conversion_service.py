@@ -0,0 +1,195 @@
+import os
+import pandas as pd
+import pyarrow.parquet as pq
+from services import data_cache
+from instrumentation import track
+from services.commercial_service import format_value
+from services.goals_service import SELLER_CODE_COLUMN, normalize_seller_codes
+
+# Etapas do funil e os tipos de documento (coluna de tipo do arquivo de linhas) que as compõem
+FUNNEL_STAGES = [
+    ('Cotação', ['OFERTA DE VENDA', 'COTAÇÃO']),
+    ('Pedido', ['PEDIDO DE VENDA']),
+    ('Faturado', ['NOTA FISCAL DE SAÍDA']),
+]
+STAGE_NAMES = [name for name, _ in FUNNEL_STAGES]
+_TYPE_TO_STAGE = {doc_type: name for name, types in FUNNEL_STAGES for doc_type in types}
+
+LINE_TYPE_COLUMN = os.getenv('PARQUET_LINHA_COLUNA_TIPO', 'TipoDoc')
+LINE_DATE_COLUMN = os.getenv('PARQUET_LINHA_COLUNA_DATA', 'Data')
+LINE_DOC_COLUMN = os.getenv('PARQUET_LINHA_COLUNA_DOC', 'DocNum')
+LINE_SELLER_COLUMN = os.getenv('PARQUET_LINHA_COLUNA_VENDEDOR', SELLER_CODE_COLUMN)
+
+# Linhas lidas por lote; o pico de memória é proporcional a este valor, não ao arquivo
+BATCH_SIZE = int(os.getenv('PARQUET_BATCH_SIZE', 65536))
+# Passadas da contagem exata de documentos quando o arquivo não vem ordenado por documento
+DOC_PARTITIONS = int(os.getenv('CONVERSION_DOC_PARTITIONS', 16))
+
+GROUP_KEYS = ['Etapa', 'Periodo', 'Vendedor']
+
+
+def _stage_batches(parquet_file, columns):
+    """Lotes do arquivo de linhas com as colunas Etapa, Periodo e Vendedor calculadas."""
+    for batch in parquet_file.iter_batches(batch_size=BATCH_SIZE, columns=columns):
+        df = batch.to_pandas()
+        df['Etapa'] = df[LINE_TYPE_COLUMN].map(_TYPE_TO_STAGE)
+        df = df.dropna(subset=['Etapa', LINE_SELLER_COLUMN])
+        if df.empty:
+            continue
+
+        df['Periodo'] = pd.to_datetime(df[LINE_DATE_COLUMN], errors='coerce').dt.strftime('%Y-%m')
+        df = df.dropna(subset=['Periodo'])
+        df['Vendedor'] = normalize_seller_codes(df[LINE_SELLER_COLUMN])
+        yield df
+
+
+def _count_documents_partitioned(parquet_file, columns, partitions=DOC_PARTITIONS):
+    """Documentos distintos por grupo, exato em qualquer ordem do arquivo.
+
+    Lê o arquivo uma vez por partição e, em cada passada, considera só os
+    documentos cujo hash cai na partição: o conjunto de vistos guarda cerca de
+    1/`partitions` dos documentos. Cada documento conta no grupo da sua primeira
+    linha, como na contagem do arquivo ordenado.
+    """
+    counts = None
+    for partition in range(partitions):
+        seen_docs = set()
+        for df in _stage_batches(parquet_file, columns):
+            docs = df.drop_duplicates(subset=['Etapa', LINE_DOC_COLUMN])
+            docs = docs[docs[LINE_DOC_COLUMN].notna()]
+            hashes = pd.util.hash_pandas_object(docs[LINE_DOC_COLUMN], index=False).to_numpy()
+            docs = docs[hashes % partitions == partition]
+            doc_keys = list(zip(docs['Etapa'], docs[LINE_DOC_COLUMN]))
+            is_new = [key not in seen_docs for key in doc_keys]
+            seen_docs.update(doc_keys)
+            batch_counts = docs.loc[is_new].groupby(GROUP_KEYS).size()
+            counts = batch_counts if counts is None else counts.add(batch_counts, fill_value=0)
+    return counts
+
+
+def _build_conversion_aggregate(path_line):
+    """Agrega o arquivo de linhas por etapa x mês x vendedor, lendo um lote por vez.
+
+    Somas e contagens de linhas são acumuladas por grupo. Os documentos distintos
+    são contados em uma passada quando, dentro de cada etapa, os números de
+    documento nunca diminuem ao longo do arquivo (o ERP exporta ordenado por
+    documento): basta lembrar o último documento de cada etapa para não contar de
+    novo um documento cujas linhas continuam no lote seguinte. A ordem é conferida
+    a cada lote; se ela não vale, os documentos são recontados por
+    `_count_documents_partitioned`. Em ambos os casos a memória fica limitada, qualquer
+    que seja o tamanho do arquivo.
+    """
+    columns = [LINE_TYPE_COLUMN, LINE_DATE_COLUMN, LINE_DOC_COLUMN, LINE_SELLER_COLUMN, 'TotalLinha']
+    parquet_file = pq.ParquetFile(path_line)
+    missing = [c for c in columns if c not in parquet_file.schema_arrow.names]
+    if missing:
+        raise KeyError(f"Colunas não encontradas no arquivo de linhas: {', '.join(missing)}")
+
+    totals = None
+    last_doc = {}
+    ordered = True
+
+    for df in _stage_batches(parquet_file, columns):
+        batch_totals = df.groupby(GROUP_KEYS).agg(
+            Valor=('TotalLinha', 'sum'),
+            Linhas=('TotalLinha', 'size')
+        )
+
+        if ordered:
+            for stage, stage_docs in df.groupby('Etapa', sort=False)[LINE_DOC_COLUMN]:
+                if not stage_docs.is_monotonic_increasing or (
+                        stage in last_doc and stage_docs.iloc[0] < last_doc[stage]):
+                    ordered = False
+                    break
+        if ordered:
+            # Documentos do lote, sem o que continua do lote anterior da mesma etapa
+            docs = df.drop_duplicates(subset=['Etapa', LINE_DOC_COLUMN])
+            is_new = [last_doc.get(stage) != doc for stage, doc in zip(docs['Etapa'], docs[LINE_DOC_COLUMN])]
+            last_doc.update(zip(docs['Etapa'], docs[LINE_DOC_COLUMN]))
+            batch_totals['Documentos'] = docs.loc[is_new].groupby(GROUP_KEYS).size()
+        batch_totals = batch_totals.fillna(0)
+
+        totals = batch_totals if totals is None else totals.add(batch_totals, fill_value=0)
+
+    if totals is None:
+        return pd.DataFrame(columns=['Etapa', 'Periodo', 'Vendedor', 'Valor', 'Linhas', 'Documentos'])
+    if not ordered:
+        totals['Documentos'] = _count_documents_partitioned(parquet_file, columns)
+        totals['Documentos'] = totals['Documentos'].fillna(0)
+    return totals.reset_index()
+
+
+def _conversion_rates(values):
+    """Taxas de conversão entre etapas consecutivas (em %)."""
+    rates = {}
+    for previous, current in zip(STAGE_NAMES, STAGE_NAMES[1:]):
+        base = values.get(previous, 0)
+        rates[f'{previous}→{current}'] = (values.get(current, 0) / base) * 100 if base else None
+    return rates
+
+
+def _pivot_rows(df, key):
+    rows = []
+    if df.empty:
+        return rows
+    pivot_valor = df.pivot_table(index=key, columns='Etapa', values='Valor', aggfunc='sum', fill_value=0)
+    pivot_docs = df.pivot_table(index=key, columns='Etapa', values='Documentos', aggfunc='sum', fill_value=0)
+    for index_value in pivot_valor.index:
+        valores = {stage: float(pivot_valor.loc[index_value].get(stage, 0)) for stage in STAGE_NAMES}
+        documentos = {stage: int(pivot_docs.loc[index_value].get(stage, 0)) for stage in STAGE_NAMES}
+        rows.append({
+            key: index_value,
+            'valores': valores,
+            'valores_fmt': {stage: format_value(v) for stage, v in valores.items()},
+            'documentos': documentos,
+            'taxas': _conversion_rates(valores),
+        })
+    return rows
+
+
+def calculate_conversion(start_period, end_period, codigo_vendedor=None):
+    """Retorna (data, error) com o funil por mês e por vendedor no intervalo de meses."""
+    path_line = os.getenv('PARQUET_ANALISE_VENDA_LINE')
+    if not path_line:
+        return {}, "Variável de ambiente 'PARQUET_ANALISE_VENDA_LINE' não definida."
+    if not os.path.exists(path_line):
+        return {}, f"Arquivo de dados '{path_line}' não encontrado."
+
+    try:
+        with track('stage', 'parquet.conversion_aggregate'):
+            aggregate = data_cache.get_or_build(
+                'conversion_aggregate', [path_line], lambda: _build_conversion_aggregate(path_line)
+            )
+    except Exception as e:
+        return {}, f"Erro ao processar o arquivo de dados: \"{e}\""
+
+    mask = (aggregate['Periodo'] >= start_period) & (aggregate['Periodo'] <= end_period)
+    if codigo_vendedor is not None:
+        mask &= aggregate['Vendedor'] == codigo_vendedor
+    filtered = aggregate.loc[mask]
+
+    if filtered.empty:
+        return {}, "Nenhum dado encontrado para o período selecionado."
+
+    periods = sorted(_pivot_rows(filtered, 'Periodo'), key=lambda r: r['Periodo'])
+    sellers = _pivot_rows(filtered, 'Vendedor')
+    sellers.sort(key=lambda r: r['valores'].get(STAGE_NAMES[-1], 0), reverse=True)
+
+    stage_totals = filtered.groupby('Etapa')['Valor'].sum().to_dict()
+    totals = {stage: float(stage_totals.get(stage, 0)) for stage in STAGE_NAMES}
+
+    chart_data = {
+        'labels': [row['Periodo'] for row in periods],
+        'stages': STAGE_NAMES,
+        'series': {stage: [row['valores'][stage] for row in periods] for stage in STAGE_NAMES},
+    }
+
+    return {
+        'stages': STAGE_NAMES,
+        'periods': periods,
+        'sellers': sellers,
+        'totals': totals,
+        'totals_fmt': {stage: format_value(v) for stage, v in totals.items()},
+        'taxas': _conversion_rates(totals),
+        'chart_data': chart_data,
+    }, None
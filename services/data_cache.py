@@ -0,0 +1,51 @@
+import os
+import threading
+
+# Estruturas derivadas dos arquivos de dados ficam em memória até que algum
+# dos arquivos de origem mude (mtime/tamanho), evitando reprocessar a cada request.
+_cache = {}
+_cache_lock = threading.Lock()
+_build_locks = {}
+
+
+def data_version(*paths):
+    """Retorna a versão dos arquivos de dados (caminho, mtime e tamanho)."""
+    version = []
+    for path in paths:
+        stat = os.stat(path)
+        version.append((path, stat.st_mtime_ns, stat.st_size))
+    return tuple(version)
+
+
+def _build_lock(name):
+    with _cache_lock:
+        if name not in _build_locks:
+            _build_locks[name] = threading.Lock()
+        return _build_locks[name]
+
+
+def get_or_build(name, paths, builder):
+    """Retorna o valor em cache para `name`, reconstruindo-o quando os arquivos mudarem."""
+    version = data_version(*paths)
+    entry = _cache.get(name)
+    if entry and entry[0] == version:
+        return entry[1]
+
+    # Apenas uma thread reconstrói; as demais aguardam e reaproveitam o resultado.
+    with _build_lock(name):
+        entry = _cache.get(name)
+        if entry and entry[0] == version:
+            return entry[1]
+        value = builder()
+        with _cache_lock:
+            _cache[name] = (version, value)
+        return value
+
+
+def invalidate(name=None):
+    """Remove uma entrada (ou todas) do cache."""
+    with _cache_lock:
+        if name is None:
+            _cache.clear()
+        else:
+            _cache.pop(name, None)
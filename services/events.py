@@ -0,0 +1,215 @@
+"""Eventos de alteração de chamados para as páginas abertas (server-sent events).
+
+Pub/sub local, no próprio processo, sem broker externo. O ticket_service marca os
+chamados alterados (`touch_ticket`, criação, alterações em lote) na sessão do
+banco; depois do commit, um evento `{ticket_id, version}` é entregue a cada
+assinante interessado naquele chamado. Cada página aberta é um assinante: a
+tela do chamado acompanha um id e a lista acompanha os ids exibidos (e, se
+pedir, a criação de chamados novos).
+
+Num deploy com vários processos, um commit feito em outro worker não passa por
+este processo. Para esses casos um único thread por processo consulta, a cada
+TICKET_EVENTS_POLL_SECONDS (padrão 5; 0 desliga), as versões dos chamados
+acompanhados e o maior id, e publica as diferenças. É uma consulta por processo
+por intervalo, qualquer que seja o número de páginas abertas.
+
+Cada assinante tem uma fila limitada; se ela encher (cliente lento), o stream
+envia `resync` e a página se recarrega.
+
+Cada stream aberto ocupa uma thread do servidor enquanto dura. Por isso:
+- TICKET_EVENTS_MAX_SUBSCRIBERS (padrão 4) limita os streams simultâneos por
+  processo. Acima do limite a resposta é só `retry:` (o navegador tenta de novo
+  depois de REFUSED_RETRY_MS) e a página funciona sem atualização ao vivo. Com
+  workers síncronos do gunicorn (um request por vez) use 0, que desliga os
+  eventos; com `--worker-class gthread`, mantenha o valor bem abaixo de
+  `--threads` para sobrar thread para as demais rotas.
+- TICKET_EVENTS_STREAM_SECONDS (padrão 30) encerra cada stream; o navegador
+  reconecta sozinho e a vaga é disputada de novo.
+"""
+import os
+import json
+import queue
+import time
+import threading
+from sqlalchemy import event, select, func
+from sqlalchemy.orm import Session
+from models.ticket import db, Ticket
+
+EVENT_QUEUE_SIZE = 100
+HEARTBEAT_SECONDS = 15
+STREAM_SECONDS = int(os.getenv('TICKET_EVENTS_STREAM_SECONDS', 30))
+POLL_SECONDS = float(os.getenv('TICKET_EVENTS_POLL_SECONDS', 5))
+MAX_SUBSCRIBERS = int(os.getenv('TICKET_EVENTS_MAX_SUBSCRIBERS', 4))
+RETRY_MS = 3000
+REFUSED_RETRY_MS = 30000
+
+_PENDING_KEY = 'ticket_events_pending'
+_READY_KEY = 'ticket_events_ready'
+
+
+class Subscription:
+    """Página aberta: versões conhecidas dos chamados acompanhados e filtro de dono."""
+
+    def __init__(self, versions, watch_new=False, max_id=0, owner=None):
+        self.versions = dict(versions)
+        self.watch_new = watch_new
+        self.max_id = max_id
+        self.owner = owner  # None: administrador, vê todos os chamados
+        self.queue = queue.Queue(maxsize=EVENT_QUEUE_SIZE)
+        self.overflowed = False
+
+    def offer(self, change):
+        ticket_id, version, user_email = change
+        if self.owner is not None and user_email != self.owner:
+            return
+        if ticket_id in self.versions:
+            if version <= self.versions[ticket_id]:
+                return
+            self.versions[ticket_id] = version
+            self._put({'type': 'ticket', 'ticket_id': ticket_id, 'version': version})
+        elif self.watch_new and ticket_id > self.max_id:
+            self.max_id = ticket_id
+            self._put({'type': 'created', 'ticket_id': ticket_id})
+
+    def _put(self, payload):
+        try:
+            self.queue.put_nowait(payload)
+        except queue.Full:
+            self.overflowed = True
+
+
+class EventBroker:
+    def __init__(self, poll_seconds=POLL_SECONDS, max_subscribers=MAX_SUBSCRIBERS):
+        self.poll_seconds = poll_seconds
+        self.max_subscribers = max_subscribers
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._poller = None
+        self._app = None
+
+    def subscribe(self, subscription, app=None):
+        """Registra a assinatura; retorna None se o limite de streams do processo foi atingido."""
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                return None
+            self._subscribers.add(subscription)
+            if app is not None and self.poll_seconds > 0 and (self._poller is None or not self._poller.is_alive()):
+                self._app = app
+                self._poller = threading.Thread(target=self._poll_loop, name='ticket-events-poller', daemon=True)
+                self._poller.start()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def publish(self, changes):
+        """Entrega as alterações [(ticket_id, version, user_email)] aos assinantes."""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            for change in changes:
+                subscription.offer(change)
+
+    def _poll_loop(self):
+        while True:
+            with self._lock:
+                subscribers = list(self._subscribers)
+                if not subscribers:
+                    self._poller = None
+                    return
+            try:
+                with self._app.app_context():
+                    self.publish(_current_changes(subscribers))
+            except Exception as e:
+                print(f"Erro ao consultar alterações de chamados: {e}")
+            time.sleep(self.poll_seconds)
+
+
+def _current_changes(subscribers):
+    """Versões atuais dos chamados acompanhados e chamados criados desde a abertura das páginas."""
+    watched = set()
+    for subscription in subscribers:
+        watched.update(subscription.versions)
+    watched = sorted(watched)
+
+    changes = []
+    for start in range(0, len(watched), 500):
+        changes.extend(db.session.execute(
+            select(Ticket.id, Ticket.version, Ticket.user_email).where(Ticket.id.in_(watched[start:start + 500]))
+        ).all())
+
+    new_watchers = [s for s in subscribers if s.watch_new]
+    if new_watchers:
+        since = min(s.max_id for s in new_watchers)
+        changes.extend(db.session.execute(
+            select(Ticket.id, Ticket.version, Ticket.user_email).where(Ticket.id > since).order_by(Ticket.id)
+        ).all())
+    return [tuple(row) for row in changes]
+
+
+broker = EventBroker()
+
+
+def current_max_ticket_id():
+    return db.session.execute(select(func.max(Ticket.id))).scalar() or 0
+
+
+def mark_changed(ticket_ids):
+    """Registra chamados alterados na transação atual; o evento sai depois do commit."""
+    db.session.info.setdefault(_PENDING_KEY, set()).update(ticket_ids)
+
+
+@event.listens_for(Session, 'before_commit')
+def _collect_versions(session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending:
+        session.flush()
+        rows = session.execute(
+            select(Ticket.id, Ticket.version, Ticket.user_email).where(Ticket.id.in_(pending))
+        ).all()
+        session.info[_READY_KEY] = [tuple(row) for row in rows]
+
+
+@event.listens_for(Session, 'after_commit')
+def _publish_committed(session):
+    changes = session.info.pop(_READY_KEY, None)
+    if changes:
+        broker.publish(changes)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_pending(session):
+    session.info.pop(_PENDING_KEY, None)
+    session.info.pop(_READY_KEY, None)
+
+
+def stream(subscription, max_seconds=STREAM_SECONDS, heartbeat=HEARTBEAT_SECONDS):
+    """Gera o corpo `text/event-stream` de uma assinatura.
+
+    A conexão é encerrada após `max_seconds` para liberar o worker; o navegador
+    reconecta sozinho (EventSource).
+    """
+    deadline = time.monotonic() + max_seconds
+    try:
+        yield f'retry: {RETRY_MS}\n\n'
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            try:
+                payload = subscription.queue.get(timeout=min(heartbeat, remaining))
+            except queue.Empty:
+                yield ': ping\n\n'
+                continue
+            if subscription.overflowed:
+                yield 'event: resync\ndata: {}\n\n'
+                return
+            yield f"event: {payload['type']}\ndata: {json.dumps(payload)}\n\n"
+    finally:
+        broker.unsubscribe(subscription)
+
+
+def refused_stream():
+    """Resposta quando não há vaga: o navegador reconecta depois de REFUSED_RETRY_MS."""
+    yield f'retry: {REFUSED_RETRY_MS}\n\n'
@@ -0,0 +1,123 @@
+"""Exportação em streaming para CSV ou Parquet.
+
+Os dados chegam em lotes (tabelas pyarrow) e cada lote é escrito e enviado ao
+cliente antes de o próximo ser lido, então a memória usada pelo worker é a de um
+lote, qualquer que seja o tamanho da exportação. No Parquet cada lote vira um
+row group; no CSV (separador ';' e BOM UTF-8, para abrir direto no Excel em
+português) cada lote vira um bloco de linhas.
+"""
+import os
+from datetime import datetime
+from flask import Response, stream_with_context
+
+BATCH_SIZE = int(os.getenv('EXPORT_BATCH_SIZE', 1000))
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+_UTF8_BOM = b'\xef\xbb\xbf'
+
+
+class _ChunkSink:
+    """Destino de escrita em memória que é esvaziado a cada lote enviado."""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data):
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _arrow_type(column_type):
+    import pyarrow as pa
+    return {
+        'int': pa.int64(),
+        'float': pa.float64(),
+        'string': pa.string(),
+        'timestamp': pa.timestamp('us'),
+    }[column_type]
+
+
+def rows_to_tables(columns, row_batches):
+    """Converte lotes de tuplas em tabelas pyarrow; `columns` é uma lista de (nome, tipo).
+
+    Retorna (schema, gerador de tabelas).
+    """
+    import pyarrow as pa
+    schema = pa.schema([(name, _arrow_type(column_type)) for name, column_type in columns])
+
+    def tables():
+        for rows in row_batches:
+            values = list(zip(*rows))
+            yield pa.Table.from_arrays([pa.array(v, type=f.type) for v, f in zip(values, schema)], schema=schema)
+
+    return schema, tables()
+
+
+def stream_tables(tables, export_format, schema=None):
+    """Gera os bytes do arquivo à medida que cada tabela pyarrow é escrita.
+
+    Sem `schema`, usa o da primeira tabela; as seguintes são convertidas para ele.
+    """
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+
+    sink = _ChunkSink()
+    writer = None
+
+    def open_writer(writer_schema):
+        if export_format == 'csv':
+            sink.write(_UTF8_BOM)
+            return pa_csv.CSVWriter(sink, writer_schema, write_options=pa_csv.WriteOptions(delimiter=';'))
+        return pq.ParquetWriter(sink, writer_schema, compression='snappy')
+
+    try:
+        if schema is not None:
+            writer = open_writer(schema)
+        for table in tables:
+            if writer is None:
+                schema = table.schema
+                writer = open_writer(schema)
+            elif table.schema != schema:
+                table = table.cast(schema)
+            writer.write_table(table)
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    finally:
+        if writer is not None:
+            writer.close()
+    tail = sink.drain()
+    if tail:
+        yield tail
+
+
+def export_response(tables, export_format, basename, schema=None):
+    """Resposta HTTP em streaming com o arquivo exportado."""
+    filename = f"{basename}_{datetime.now().strftime('%Y%m%d_%H%M')}.{export_format}"
+    return Response(
+        stream_with_context(stream_tables(tables, export_format, schema=schema)),
+        mimetype=EXPORT_FORMATS[export_format],
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'},
+    )
@@ -0,0 +1,85 @@
+from datetime import datetime
+from services.kpi_framework import register_dataset, evaluate_kpi
+from services.commercial_service import format_value
+
+TYPE_RECEIVABLE = 'RECEBER'
+TYPE_PAYABLE = 'PAGAR'
+
+register_dataset(
+    'financeiro',
+    env='PARQUET_FINANCEIRO',
+    date_column='DataVencimento',
+    columns=['DataVencimento', 'Tipo', 'Valor', 'ValorPago', 'DocNum'],
+)
+
+FINANCIAL_SUMMARY = {
+    'dataset': 'financeiro',
+    'group_by': ['Tipo'],
+    'measures': {
+        'Valor': ('Valor', 'sum'),
+        'ValorPago': ('ValorPago', 'sum'),
+        'Quantidade': ('DocNum', 'count'),
+    },
+    'ratios': {
+        'Percentual_liquidado': ('ValorPago', 'Valor', 100),
+    },
+}
+
+FINANCIAL_MONTHLY = {
+    'dataset': 'financeiro',
+    'group_by': ['Tipo'],
+    'date_freq': 'M',
+    'date_key': 'Mes',
+    'measures': {
+        'Valor': ('Valor', 'sum'),
+        'ValorPago': ('ValorPago', 'sum'),
+    },
+}
+
+def calculate_financial_kpis(start_date_str, end_date_str):
+    kpis_data = {}
+    chart_data = None
+    error = None
+
+    try:
+        start_date = datetime.strptime(start_date_str, '%Y-%m-%d')
+        end_date = datetime.strptime(end_date_str, '%Y-%m-%d')
+
+        summary, error = evaluate_kpi(FINANCIAL_SUMMARY, start_date, end_date)
+        if error:
+            return kpis_data, chart_data, error
+
+        if summary.empty:
+            return {}, None, "Nenhum dado encontrado para o período selecionado."
+
+        for kpi in summary.to_dict('records'):
+            kpi['Valor_fmt'] = format_value(kpi['Valor'])
+            kpi['ValorPago_fmt'] = format_value(kpi['ValorPago'])
+            kpi['Aberto_fmt'] = format_value(kpi['Valor'] - kpi['ValorPago'])
+            kpi['Quantidade_fmt'] = format_value(kpi['Quantidade'], is_currency=False)
+            kpis_data[kpi['Tipo']] = kpi
+
+        receivable = summary.loc[summary['Tipo'] == TYPE_RECEIVABLE, 'Valor'].sum()
+        payable = summary.loc[summary['Tipo'] == TYPE_PAYABLE, 'Valor'].sum()
+        kpis_data['SALDO'] = {'Tipo': 'SALDO', 'Valor_fmt': format_value(receivable - payable)}
+
+        monthly, error = evaluate_kpi(FINANCIAL_MONTHLY, start_date, end_date)
+        if error:
+            return kpis_data, chart_data, error
+
+        if not monthly.empty:
+            pivot = monthly.pivot_table(index='Mes', columns='Tipo', values='Valor', aggfunc='sum', fill_value=0)
+            pivot = pivot.reindex(columns=[TYPE_RECEIVABLE, TYPE_PAYABLE], fill_value=0)
+            receitas = pivot[TYPE_RECEIVABLE]
+            despesas = pivot[TYPE_PAYABLE]
+            chart_data = {
+                'labels': [d.strftime('%m/%Y') for d in pivot.index],
+                'receitas_data': [float(v) for v in receitas],
+                'despesas_data': [float(v) for v in despesas],
+                'saldo_data': [float(r - d) for r, d in zip(receitas, despesas)],
+            }
+
+    except Exception as e:
+        error = f"Erro ao processar o arquivo de dados: \"{e}\""
+
+    return kpis_data, chart_data, error
@@ -0,0 +1,183 @@
+import os
+import calendar
+from datetime import date, datetime
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+from models.ticket import db
+from models.goal import SellerGoal
+from services import data_cache
+from instrumentation import track
+from services.commercial_service import format_value
+
+# Tipos de nota que compõem o faturamento líquido (mesma regra de calculate_commercial_kpis)
+REVENUE_TYPES = ['NOTA FISCAL DE SAÍDA', 'CANCELAMENTO', 'DEVOLUÇÃO']
+
+SELLER_CODE_COLUMN = os.getenv('PARQUET_COLUNA_COD_VENDEDOR', 'CodigoVendedor')
+SELLER_NAME_COLUMN = os.getenv('PARQUET_COLUNA_NOME_VENDEDOR', 'NomeVendedor')
+
+
+def normalize_seller_codes(series):
+    """Converte os códigos de vendedor para texto, como gravados no Firebase."""
+    if pd.api.types.is_numeric_dtype(series):
+        return series.astype('Int64').astype(str)
+    return series.astype(str).str.strip()
+
+
+def _build_seller_cube(path_head):
+    """Agrega o arquivo de cabeçalho por vendedor x dia e guarda somas acumuladas.
+
+    Com as somas acumuladas por vendedor, o total de qualquer período sai de
+    duas buscas binárias, sem refazer o groupby a cada request.
+    """
+    schema_names = pq.read_schema(path_head).names
+    if SELLER_CODE_COLUMN not in schema_names:
+        raise KeyError(f"Coluna de vendedor '{SELLER_CODE_COLUMN}' não encontrada no arquivo de dados.")
+
+    columns = ['Data', 'TipoNs', 'ValorTotal', 'PesoTotal', SELLER_CODE_COLUMN]
+    if SELLER_NAME_COLUMN in schema_names:
+        columns.append(SELLER_NAME_COLUMN)
+
+    df = pd.read_parquet(path_head, columns=columns)
+    df = df[df['TipoNs'].isin(REVENUE_TYPES)]
+    df = df.dropna(subset=[SELLER_CODE_COLUMN])
+    df['Data'] = pd.to_datetime(df['Data'], errors='coerce').dt.normalize()
+    df = df.dropna(subset=['Data'])
+    df['Vendedor'] = normalize_seller_codes(df[SELLER_CODE_COLUMN])
+
+    names = {}
+    if SELLER_NAME_COLUMN in df.columns:
+        names = df.drop_duplicates('Vendedor', keep='last').set_index('Vendedor')[SELLER_NAME_COLUMN].to_dict()
+
+    daily = df.groupby(['Vendedor', 'Data'], sort=True).agg(
+        Valor=('ValorTotal', 'sum'),
+        Peso=('PesoTotal', 'sum')
+    ).reset_index()
+
+    sellers = {}
+    for code, group in daily.groupby('Vendedor', sort=False):
+        sellers[code] = {
+            'dates': group['Data'].to_numpy(dtype='datetime64[D]'),
+            'cum_valor': np.concatenate(([0.0], group['Valor'].to_numpy(dtype=float).cumsum())),
+            'cum_peso': np.concatenate(([0.0], group['Peso'].to_numpy(dtype=float).cumsum())),
+        }
+
+    return {'sellers': sellers, 'names': names}
+
+
+def _period_totals(entry, start, end):
+    """Soma valor e peso de um vendedor entre `start` e `end` (inclusive)."""
+    if entry is None:
+        return 0.0, 0.0
+    dates = entry['dates']
+    lo = np.searchsorted(dates, np.datetime64(start, 'D'), side='left')
+    hi = np.searchsorted(dates, np.datetime64(end, 'D'), side='right')
+    valor = entry['cum_valor'][hi] - entry['cum_valor'][lo]
+    peso = entry['cum_peso'][hi] - entry['cum_peso'][lo]
+    return float(valor), float(peso)
+
+
+def get_seller_cube():
+    """Retorna (cube, error) a partir do arquivo de cabeçalho de vendas."""
+    path_head = os.getenv('PARQUET_ANALISE_VENDA_HEAD')
+    if not path_head:
+        return None, "Variável de ambiente 'PARQUET_ANALISE_VENDA_HEAD' não definida."
+    if not os.path.exists(path_head):
+        return None, f"Arquivo de dados '{path_head}' não encontrado."
+
+    try:
+        with track('stage', 'parquet.seller_cube'):
+            cube = data_cache.get_or_build('seller_cube', [path_head], lambda: _build_seller_cube(path_head))
+    except Exception as e:
+        return None, f"Erro ao processar o arquivo de dados: \"{e}\""
+    return cube, None
+
+
+def get_period_bounds(period):
+    """Converte 'YYYY-MM' no primeiro e no último dia do mês."""
+    start = datetime.strptime(period, '%Y-%m').date()
+    last_day = calendar.monthrange(start.year, start.month)[1]
+    return start, start.replace(day=last_day)
+
+
+def _percent(realized, target):
+    return (realized / target) * 100 if target else None
+
+
+def _goal_row(code, name, valor, peso, goal):
+    meta_valor = goal.meta_valor if goal else 0
+    meta_peso = goal.meta_peso if goal else 0
+    return {
+        'codigo_vendedor': code,
+        'nome_vendedor': name or code,
+        'realizado_valor': valor,
+        'realizado_peso': peso,
+        'meta_valor': meta_valor,
+        'meta_peso': meta_peso,
+        'pct_valor': _percent(valor, meta_valor),
+        'pct_peso': _percent(peso, meta_peso),
+        'realizado_valor_fmt': format_value(valor),
+        'realizado_peso_fmt': format_value(peso, is_currency=False) + " kg",
+        'meta_valor_fmt': format_value(meta_valor),
+        'meta_peso_fmt': format_value(meta_peso, is_currency=False) + " kg",
+    }
+
+
+def calculate_seller_goals(period, codigo_vendedor=None):
+    """Calcula realizado x meta no período.
+
+    Com `codigo_vendedor`, retorna apenas a linha daquele vendedor; sem ele,
+    retorna o ranking de todos os vendedores com venda ou meta no período.
+    """
+    try:
+        start, end = get_period_bounds(period)
+    except ValueError:
+        return [], "Período inválido. Use o formato AAAA-MM."
+
+    cube, error = get_seller_cube()
+    if error:
+        return [], error
+
+    goals_query = SellerGoal.query.filter_by(period=period)
+    if codigo_vendedor is not None:
+        goals_query = goals_query.filter_by(codigo_vendedor=codigo_vendedor)
+    goals = {g.codigo_vendedor: g for g in goals_query.all()}
+
+    if codigo_vendedor is not None:
+        codes = [codigo_vendedor]
+    else:
+        codes = set(cube['sellers']) | set(goals)
+
+    rows = []
+    for code in codes:
+        valor, peso = _period_totals(cube['sellers'].get(code), start, end)
+        goal = goals.get(code)
+        if codigo_vendedor is None and not goal and valor == 0 and peso == 0:
+            continue
+        rows.append(_goal_row(code, cube['names'].get(code), valor, peso, goal))
+
+    rows.sort(key=lambda r: (r['pct_valor'] is not None, r['pct_valor'] or 0, r['realizado_valor']), reverse=True)
+    for position, row in enumerate(rows, start=1):
+        row['posicao'] = position
+
+    return rows, None
+
+
+def save_seller_goal(codigo_vendedor, period, meta_valor, meta_peso, user_email):
+    """Cria ou atualiza a meta de um vendedor para o período."""
+    get_period_bounds(period)  # valida o formato
+
+    goal = SellerGoal.query.filter_by(codigo_vendedor=codigo_vendedor, period=period).first()
+    if not goal:
+        goal = SellerGoal(codigo_vendedor=codigo_vendedor, period=period)
+        db.session.add(goal)
+
+    goal.meta_valor = float(meta_valor or 0)
+    goal.meta_peso = float(meta_peso or 0)
+    goal.updated_by = user_email
+    db.session.commit()
+    return goal
+
+
+def current_period():
+    return date.today().strftime('%Y-%m')
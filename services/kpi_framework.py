@@ -0,0 +1,180 @@
+import os
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from services import data_cache
+from instrumentation import track
+
+# Registro das fontes de dados. Cada dataset aponta para um arquivo Parquet (via variável
+# de ambiente), declara a coluna de data e, opcionalmente, as colunas a carregar e uma
+# função `prepare` aplicada uma única vez por versão dos arquivos.
+DATASETS = {}
+
+
+def register_dataset(name, env, date_column=None, columns=None, prepare=None, depends_on=None):
+    """Registra uma fonte de dados para uso nas definições de KPI."""
+    DATASETS[name] = {
+        'env': env,
+        'date_column': date_column,
+        'columns': columns,
+        'prepare': prepare,
+        'depends_on': depends_on or [],
+    }
+
+
+def _dataset_paths(name):
+    """Retorna (paths, error) com o arquivo do dataset e de suas dependências."""
+    spec = DATASETS[name]
+    paths = []
+    for dataset_name in [name] + spec['depends_on']:
+        env = DATASETS[dataset_name]['env']
+        path = os.getenv(env)
+        if not path:
+            return None, f"Variável de ambiente '{env}' não definida."
+        if not os.path.exists(path):
+            return None, f"Arquivo de dados '{path}' não encontrado."
+        paths.append(path)
+    return paths, None
+
+
+def _load_dataset(name):
+    spec = DATASETS[name]
+    path = os.getenv(spec['env'])
+    df = pd.read_parquet(path, columns=spec['columns'])
+
+    if spec['prepare']:
+        df = spec['prepare'](df)
+
+    date_column = spec['date_column']
+    if date_column:
+        df[date_column] = pd.to_datetime(df[date_column], errors='coerce')
+        # Ordenado por data, o recorte de período vira duas buscas binárias
+        df = df.dropna(subset=[date_column]).sort_values(date_column, kind='stable').reset_index(drop=True)
+    return df
+
+
+def load_dataset(name):
+    """Retorna (DataFrame, error); o DataFrame é compartilhado entre requests e não deve ser alterado."""
+    paths, error = _dataset_paths(name)
+    if error:
+        return None, error
+    with track('stage', f'parquet.load.{name}'):
+        return data_cache.get_or_build(f'kpi:{name}', paths, lambda: _load_dataset(name)), None
+
+
+def stream_group_sum(path, key, columns, batch_size=65536):
+    """Soma `columns` agrupando por `key` lendo o Parquet em lotes (memória limitada ao lote)."""
+    totals = None
+    parquet_file = pq.ParquetFile(path)
+    for batch in parquet_file.iter_batches(batch_size=batch_size, columns=[key] + columns):
+        batch_totals = batch.to_pandas().groupby(key)[columns].sum()
+        totals = batch_totals if totals is None else totals.add(batch_totals, fill_value=0)
+    if totals is None:
+        return pd.DataFrame(columns=[key] + columns)
+    return totals.reset_index()
+
+
+def iter_dataset_batches(name, start_date=None, end_date=None, batch_size=65536):
+    """Lê as linhas brutas do dataset em lotes (pyarrow.Table), já filtradas pelo período.
+
+    Lê direto do arquivo, sem passar pelo cache nem pelo `prepare`: a memória fica
+    limitada a um lote. Retorna (schema, gerador de tabelas, error).
+    """
+    spec = DATASETS[name]
+    path = os.getenv(spec['env'])
+    if not path:
+        return None, None, f"Variável de ambiente '{spec['env']}' não definida."
+    if not os.path.exists(path):
+        return None, None, f"Arquivo de dados '{path}' não encontrado."
+
+    parquet_file = pq.ParquetFile(path)
+    schema = parquet_file.schema_arrow
+    if spec['columns']:
+        schema = pa.schema([schema.field(column) for column in spec['columns']])
+    date_column = spec['date_column']
+
+    def batches():
+        for batch in parquet_file.iter_batches(batch_size=batch_size, columns=spec['columns']):
+            if date_column and (start_date or end_date):
+                dates = pd.to_datetime(batch.column(date_column).to_pandas(), errors='coerce')
+                mask = dates.notna()
+                if start_date:
+                    mask &= dates >= start_date
+                if end_date:
+                    mask &= dates <= end_date
+                batch = batch.filter(pa.array(mask.to_numpy()))
+            if batch.num_rows:
+                yield pa.Table.from_batches([batch])
+
+    return schema, batches(), None
+
+
+def _slice_period(df, date_column, start_date, end_date):
+    dates = df[date_column].to_numpy()
+    lo = np.searchsorted(dates, np.datetime64(start_date), side='left')
+    hi = np.searchsorted(dates, np.datetime64(end_date), side='right')
+    return df.iloc[lo:hi]
+
+
+def _apply_filters(df, definition):
+    for column, values in definition.get('include', {}).items():
+        df = df[df[column].isin(values)]
+    for column, values in definition.get('exclude', {}).items():
+        df = df[~df[column].isin(values)]
+    return df
+
+
+def safe_ratio(numerator, denominator, scale=1):
+    """Divisão vetorizada que retorna 0 quando o denominador não é positivo."""
+    numerator = np.asarray(numerator, dtype=float)
+    denominator = np.asarray(denominator, dtype=float)
+    result = np.zeros_like(numerator)
+    np.divide(numerator, denominator, out=result, where=denominator > 0)
+    return result * scale
+
+
+def evaluate_kpi(definition, start_date, end_date):
+    """Avalia uma definição de KPI no período e retorna (DataFrame, error).
+
+    A definição é um dicionário com:
+      - dataset: nome registrado em DATASETS
+      - group_by: colunas de agrupamento
+      - date_freq: opcional, agrupa também pela data truncada ('D' ou 'M') na coluna `date_key`
+      - include/exclude: {coluna: [valores]} para filtrar linhas
+      - measures: {nome: (coluna, agregação)}, no formato de `DataFrame.agg`
+      - ratios: {nome: (numerador, denominador, escala)}, expressões avaliadas sobre as medidas
+    """
+    df, error = load_dataset(definition['dataset'])
+    if error:
+        return None, error
+
+    with track('stage', f"pandas.evaluate.{definition['dataset']}"):
+        return _evaluate_loaded(df, definition, start_date, end_date), None
+
+
+def _evaluate_loaded(df, definition, start_date, end_date):
+    date_column = DATASETS[definition['dataset']]['date_column']
+    if date_column:
+        df = _slice_period(df, date_column, start_date, end_date)
+    df = _apply_filters(df, definition)
+
+    group_by = list(definition.get('group_by', []))
+    date_freq = definition.get('date_freq')
+    if date_freq:
+        date_key = definition.get('date_key', date_column)
+        df = df.assign(**{date_key: df[date_column].dt.to_period(date_freq).dt.start_time})
+        group_by.append(date_key)
+
+    if df.empty:
+        return pd.DataFrame(columns=group_by + list(definition['measures']) + list(definition.get('ratios', {})))
+
+    if group_by:
+        result = df.groupby(group_by, sort=True).agg(**definition['measures']).reset_index()
+    else:
+        result = df.groupby(np.zeros(len(df), dtype=int)).agg(**definition['measures']).reset_index(drop=True)
+
+    for name, (numerator, denominator, scale) in definition.get('ratios', {}).items():
+        result[name] = safe_ratio(result.eval(numerator), result.eval(denominator), scale)
+
+    return result
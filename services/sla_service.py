@@ -0,0 +1,171 @@
+from datetime import datetime
+from sqlalchemy import func
+from sqlalchemy.orm.attributes import flag_modified
+from models.ticket import db, Ticket, Interaction, TicketSla
+
+CLOSED_STATUS = 'Fechado'
+
+
+def _new_summary(ticket):
+    summary = TicketSla(
+        ticket_id=ticket.id,
+        current_status=ticket.status or 'Aberto',
+        status_since=ticket.created_at or datetime.utcnow(),
+        time_in_status={}
+    )
+    db.session.add(summary)
+    return summary
+
+
+def record_ticket_created(ticket):
+    """Cria o resumo de SLA de um novo chamado (na mesma transação do chamado)."""
+    return _new_summary(ticket)
+
+
+def _apply_event(summary, ticket_user_email, ticket_created_at, user_email, action_type, interaction_data, timestamp):
+    if summary.first_response_at is None and user_email != ticket_user_email:
+        summary.first_response_at = timestamp
+        created_at = ticket_created_at or timestamp
+        summary.first_response_seconds = int((timestamp - created_at).total_seconds())
+
+    if action_type == 'status_change' and interaction_data:
+        new_status = interaction_data.get('new_status')
+        if new_status and new_status != summary.current_status:
+            elapsed = int((timestamp - summary.status_since).total_seconds())
+            time_in_status = dict(summary.time_in_status or {})
+            time_in_status[summary.current_status] = time_in_status.get(summary.current_status, 0) + max(elapsed, 0)
+            summary.time_in_status = time_in_status
+            flag_modified(summary, 'time_in_status')
+            summary.current_status = new_status
+            summary.status_since = timestamp
+
+
+def _apply_interaction(summary, ticket, interaction, timestamp):
+    _apply_event(summary, ticket.user_email, ticket.created_at, interaction.user_email,
+                 interaction.action_type, interaction.interaction_data, timestamp)
+
+
+def record_interaction(interaction, ticket=None):
+    """Atualiza o resumo de SLA com uma nova interação, sem fazer commit.
+
+    Chamado por `ticket_service.add_interaction` antes do commit, de forma que
+    interação e resumo sejam gravados na mesma transação.
+    """
+    ticket = ticket or db.session.get(Ticket, interaction.ticket_id)
+    if not ticket:
+        return None
+
+    if interaction.timestamp is None:
+        interaction.timestamp = datetime.utcnow()
+
+    summary = ticket.sla or _new_summary(ticket)
+    _apply_interaction(summary, ticket, interaction, interaction.timestamp)
+    return summary
+
+
+def record_bulk_interactions(tickets, interactions):
+    """Versão em lote de `record_interaction` para as operações em massa.
+
+    `tickets` mapeia id -> linha com user_email, created_at e status; `interactions`
+    são os dicionários inseridos em lote em Interaction. Os resumos são carregados
+    em uma única consulta e gravados no mesmo commit das interações.
+    """
+    ticket_ids = list({data['ticket_id'] for data in interactions})
+    summaries = {s.ticket_id: s for s in TicketSla.query.filter(TicketSla.ticket_id.in_(ticket_ids)).all()}
+
+    for data in interactions:
+        ticket = tickets[data['ticket_id']]
+        summary = summaries.get(ticket.id)
+        if summary is None:
+            summary = summaries[ticket.id] = _new_summary(ticket)
+        _apply_event(summary, ticket.user_email, ticket.created_at, data['user_email'],
+                     data['action_type'], data['interaction_data'], data['timestamp'])
+
+
+def rebuild_sla_summaries():
+    """Recalcula todos os resumos a partir do histórico (carga inicial ou reparo)."""
+    TicketSla.query.delete()
+    db.session.flush()
+
+    count = 0
+    for ticket in Ticket.query.order_by(Ticket.id).yield_per(500):
+        summary = _new_summary(ticket)
+        summary.current_status = 'Aberto'
+        interactions = Interaction.query.filter_by(ticket_id=ticket.id).order_by(Interaction.timestamp).all()
+        for interaction in interactions:
+            _apply_interaction(summary, ticket, interaction, interaction.timestamp or ticket.created_at)
+        # Chamados com status alterado fora do log ficam com o status atual do chamado
+        summary.current_status = ticket.status or summary.current_status
+        count += 1
+    db.session.commit()
+    return count
+
+
+def _count_by(column, *conditions):
+    query = db.session.query(column, func.count(Ticket.id)).filter(Ticket.status != CLOSED_STATUS)
+    for condition in conditions:
+        query = query.filter(condition)
+    return {key or '-': total for key, total in query.group_by(column).all()}
+
+
+def get_sla_dashboard(now=None):
+    """Métricas de backlog e SLA lidas dos resumos e de agregações indexadas em Ticket."""
+    now = now or datetime.utcnow()
+    overdue = (Ticket.deadline.isnot(None), Ticket.deadline < now)
+
+    dimensions = {
+        'sector': Ticket.sector,
+        'urgency': Ticket.urgency,
+        'assignee': Ticket.assigned_user_email,
+    }
+    backlog = {}
+    for name, column in dimensions.items():
+        open_counts = _count_by(column)
+        overdue_counts = _count_by(column, *overdue)
+        backlog[name] = sorted(
+            [{'key': key, 'open': total, 'overdue': overdue_counts.get(key, 0)} for key, total in open_counts.items()],
+            key=lambda row: (row['overdue'], row['open']), reverse=True
+        )
+
+    first_response = {}
+    for name in ('sector', 'urgency'):
+        column = dimensions[name]
+        rows = db.session.query(
+            column,
+            func.avg(TicketSla.first_response_seconds),
+            func.count(TicketSla.first_response_seconds)
+        ).join(TicketSla, TicketSla.ticket_id == Ticket.id).group_by(column).all()
+        first_response[name] = [
+            {'key': key, 'avg_seconds': float(avg) if avg is not None else None, 'count': total}
+            for key, avg, total in rows
+        ]
+
+    awaiting_first_response = db.session.query(func.count(TicketSla.ticket_id)).join(
+        Ticket, Ticket.id == TicketSla.ticket_id
+    ).filter(Ticket.status != CLOSED_STATUS, TicketSla.first_response_at.is_(None)).scalar()
+
+    # Tempo médio por status dos chamados em aberto: períodos encerrados + período corrente
+    status_totals = {}
+    status_counts = {}
+    summaries = db.session.query(
+        TicketSla.current_status, TicketSla.status_since, TicketSla.time_in_status
+    ).filter(TicketSla.current_status != CLOSED_STATUS).all()
+    for current_status, status_since, time_in_status in summaries:
+        durations = dict(time_in_status or {})
+        durations[current_status] = durations.get(current_status, 0) + (now - status_since).total_seconds()
+        for status, seconds in durations.items():
+            status_totals[status] = status_totals.get(status, 0) + seconds
+            status_counts[status] = status_counts.get(status, 0) + 1
+    time_in_status = [
+        {'key': status, 'avg_seconds': status_totals[status] / status_counts[status], 'count': status_counts[status]}
+        for status in status_totals
+    ]
+
+    return {
+        'backlog': backlog,
+        'total_open': sum(row['open'] for row in backlog['sector']),
+        'total_overdue': sum(row['overdue'] for row in backlog['sector']),
+        'awaiting_first_response': awaiting_first_response or 0,
+        'first_response': first_response,
+        'time_in_status': time_in_status,
+    }
@@ -1,15 +1,15 @@
 import os
 from datetime import datetime
 from werkzeug.utils import secure_filename
-from models.ticket import db, Ticket, Interaction, Attachment, ProjectStage
+from models.ticket import db, Ticket, Interaction, Attachment, ProjectStage, ValidationRequest
 from sqlalchemy.orm.attributes import flag_modified
-from sqlalchemy import desc, asc
+from sqlalchemy import desc, asc, insert, select, tuple_
+from sqlalchemy.orm import selectinload
+from services import sla_service, events, ticket_summary, validation_service
 
 UPLOAD_FOLDER = 'uploads/tickets'
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'pdf', 'mp4', 'mov', 'avi'}
-
-if not os.path.exists(UPLOAD_FOLDER):
-    os.makedirs(UPLOAD_FOLDER)
+INTERACTIONS_PAGE_SIZE = int(os.getenv('INTERACTIONS_PAGE_SIZE', 30))
 
 def allowed_file(filename):
     return '.' in filename and \
@@ -17,6 +17,7 @@ def allowed_file(filename):
 
 def _save_attachments(files, ticket_id, interaction_id=None, project_stage_id=None):
     """Salva os arquivos de anexo e retorna os objetos Attachment."""
+    os.makedirs(UPLOAD_FOLDER, exist_ok=True)
     attachment_objects = []
     for file in files:
         if file and file.filename and allowed_file(file.filename):
@@ -44,10 +45,31 @@ def _save_attachments(files, ticket_id, interaction_id=None, project_stage_id=No
     return attachment_objects
 
 
-def get_all_tickets(filters=None, sorting=None):
-    """Carrega todos os chamados do banco de dados com filtros e ordenação."""
-    query = Ticket.query
+def touch_ticket(ticket_id):
+    """Incrementa a versão do chamado, invalidando os fragmentos de template em cache.
+
+    Deve ser chamada na mesma transação de qualquer alteração no chamado, em suas
+    etapas, interações ou anexos. Depois do commit, as páginas abertas do chamado
+    são avisadas (services/events.py). As colunas de resumo do chamado são
+    recalculadas no mesmo UPDATE (services/ticket_summary.py).
+    """
+    Ticket.query.filter_by(id=ticket_id).update(
+        {Ticket.version: Ticket.version + 1, **ticket_summary.summary_values()}, synchronize_session=False
+    )
+    events.mark_changed([ticket_id])
 
+
+SORTABLE_FIELDS = ['id', 'urgency', 'status', 'created_at', 'title', 'sector', 'last_activity_at']
+
+TICKET_EXPORT_COLUMNS = [
+    ('id', 'int'), ('title', 'string'), ('ticket_type', 'string'), ('status', 'string'),
+    ('urgency', 'string'), ('sector', 'string'), ('user_email', 'string'),
+    ('assigned_user_email', 'string'), ('created_at', 'timestamp'), ('deadline', 'timestamp'),
+    ('description', 'string'),
+]
+
+def _filter_tickets(query, filters=None, sorting=None):
+    """Aplica filtros e ordenação da lista de chamados a uma Query ou a um select()."""
     if filters:
         if filters.get('status'):
             query = query.filter(Ticket.status.in_(filters['status']))
@@ -57,43 +79,93 @@ def get_all_tickets(filters=None, sorting=None):
             query = query.filter(Ticket.sector.in_(filters['sector']))
         if filters.get('title'):
             query = query.filter(Ticket.title.ilike(f"%{filters['title']}%"))
+        if filters.get('pending_validation'):
+            query = query.filter(Ticket.pending_validation_count > 0)
 
-    if sorting and sorting.get('by') in ['id', 'urgency', 'status', 'created_at', 'title', 'sector']:
+    if sorting and sorting.get('by') in SORTABLE_FIELDS:
         direction = desc if sorting.get('order') == 'desc' else asc
         query = query.order_by(direction(getattr(Ticket, sorting['by'])))
     else:
         # Default sort
         query = query.order_by(Ticket.created_at.desc())
 
-    return query.all()
+    return query
+
+def get_all_tickets(filters=None, sorting=None):
+    """Carrega todos os chamados do banco de dados com filtros e ordenação."""
+    return _filter_tickets(Ticket.query, filters, sorting).all()
 
 def get_user_tickets(user_email, filters=None, sorting=None):
     """Carrega os chamados de um usuário específico com filtros e ordenação."""
-    query = Ticket.query.filter_by(user_email=user_email)
+    return _filter_tickets(Ticket.query.filter_by(user_email=user_email), filters, sorting).all()
 
-    if filters:
-        if filters.get('status'):
-            query = query.filter(Ticket.status.in_(filters['status']))
-        if filters.get('urgency'):
-            query = query.filter(Ticket.urgency.in_(filters['urgency']))
-        if filters.get('sector'):
-            query = query.filter(Ticket.sector.in_(filters['sector']))
-        if filters.get('title'):
-            query = query.filter(Ticket.title.ilike(f"%{filters['title']}%"))
+def iter_ticket_export_rows(filters=None, sorting=None, user_email=None, batch_size=500):
+    """Gera lotes de tuplas (colunas de TICKET_EXPORT_COLUMNS) com os mesmos filtros da lista.
 
-    if sorting and sorting.get('by') in ['id', 'urgency', 'status', 'created_at', 'title', 'sector']:
-        direction = desc if sorting.get('order') == 'desc' else asc
-        query = query.order_by(direction(getattr(Ticket, sorting['by'])))
-    else:
-        # Default sort
-        query = query.order_by(Ticket.created_at.desc())
-
-    return query.all()
+    Usa `yield_per`: com PostgreSQL/MySQL o resultado vem de um cursor do lado do
+    servidor, e só um lote fica em memória por vez.
+    """
+    stmt = select(*[getattr(Ticket, name) for name, _ in TICKET_EXPORT_COLUMNS])
+    if user_email:
+        stmt = stmt.filter(Ticket.user_email == user_email)
+    stmt = _filter_tickets(stmt, filters, sorting).execution_options(yield_per=batch_size)
+    for partition in db.session.execute(stmt).partitions():
+        yield [tuple(row) for row in partition]
 
 def get_ticket_by_id(ticket_id):
     """Busca um ticket pelo seu ID."""
     return Ticket.query.get(ticket_id)
 
+def get_owned_ticket_ids(ticket_ids, user_email):
+    """Dos ids informados, os dos chamados abertos por `user_email`."""
+    ticket_ids = list(ticket_ids)
+    owned = set()
+    for start in range(0, len(ticket_ids), BULK_CHUNK_SIZE):
+        owned.update(db.session.execute(
+            select(Ticket.id).where(Ticket.id.in_(ticket_ids[start:start + BULK_CHUNK_SIZE]),
+                                    Ticket.user_email == user_email)
+        ).scalars())
+    return owned
+
+def _timeline_position(interaction_id):
+    """(timestamp, id) da interação, para comparar posições na linha do tempo."""
+    timestamp = select(Interaction.timestamp).where(Interaction.id == interaction_id).scalar_subquery()
+    return tuple_(Interaction.timestamp, Interaction.id), tuple_(timestamp, interaction_id)
+
+def get_interactions_page(ticket_id, stage_filter=None, before=None, limit=None, since=None):
+    """Retorna uma página das interações principais de um chamado, em ordem cronológica.
+
+    A paginação é por cursor sobre (timestamp, id): `before` é o id da interação
+    mais antiga já exibida e a página traz as `limit` anteriores a ela. Com
+    `since`, traz todas as interações a partir dessa (atualização do trecho já
+    exibido na tela). Respostas a pedidos de validação (`parent_id`) aparecem só
+    dentro do pedido. Retorna (interações, id para a próxima página ou None).
+    """
+    limit = limit or INTERACTIONS_PAGE_SIZE
+    query = Interaction.query.filter(
+        Interaction.ticket_id == ticket_id, Interaction.parent_id.is_(None)
+    ).options(
+        selectinload(Interaction.children), selectinload(Interaction.attachments),
+        selectinload(Interaction.stage)
+    )
+
+    if stage_filter and str(stage_filter).isdigit():
+        query = query.filter(Interaction.project_stage_id == int(stage_filter))
+    elif stage_filter == 'geral':
+        query = query.filter(Interaction.project_stage_id.is_(None))
+    if since:
+        position, cursor = _timeline_position(since)
+        return query.filter(position >= cursor).order_by(Interaction.timestamp, Interaction.id).all(), None
+    if before:
+        position, cursor = _timeline_position(before)
+        query = query.filter(position < cursor)
+
+    rows = query.order_by(Interaction.timestamp.desc(), Interaction.id.desc()).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    interactions = list(reversed(rows[:limit]))
+    next_before = interactions[0].id if has_more else None
+    return interactions, next_before
+
 def add_interaction(ticket_id, user_email, action_type, text=None, interaction_data=None, deadline=None, parent_id=None, project_stage_id=None):
     """Cria uma nova interação para um chamado."""
     deadline_obj = None
@@ -114,6 +186,10 @@ def add_interaction(ticket_id, user_email, action_type, text=None, interaction_d
         project_stage_id=project_stage_id
     )
     db.session.add(interaction)
+    if action_type == 'request_validation':
+        validation_service.open_request(interaction)
+    sla_service.record_interaction(interaction)
+    touch_ticket(ticket_id)
     db.session.commit()
     return interaction
 
@@ -150,6 +226,7 @@ def process_new_interaction(ticket_id, user_email, form_data, files):
         attachment_objects = _save_attachments(files, ticket_id, interaction_id=new_interaction.id)
         for att in attachment_objects:
             db.session.add(att)
+        touch_ticket(ticket_id)
         db.session.commit()
 
 
@@ -165,6 +242,8 @@ def process_validation_response(ticket_id, user_email, form_data):
     # Atualiza a interação PAI (o pedido) com o resultado
     parent_interaction.interaction_data['validation_status'] = validation_status
     flag_modified(parent_interaction, "interaction_data")
+    if parent_interaction.action_type == 'request_validation':
+        validation_service.set_status(parent_interaction, validation_status, user_email)
     
     # Cria a interação FILHA (a resposta)
     add_interaction(
@@ -186,6 +265,7 @@ def create_ticket(title, urgency, sector, description, user_email, attachments=N
         except ValueError:
             deadline_obj = None
 
+    created_at = datetime.utcnow()
     new_ticket = Ticket(
         title=title,
         urgency=urgency,
@@ -193,12 +273,16 @@ def create_ticket(title, urgency, sector, description, user_email, attachments=N
         description=description,
         user_email=user_email,
         status='Aberto',
-        created_at=datetime.utcnow(),
+        created_at=created_at,
+        last_activity_at=created_at,
         deadline=deadline_obj,
         ticket_type=ticket_type
     )
 
     db.session.add(new_ticket)
+    db.session.flush()
+    sla_service.record_ticket_created(new_ticket)
+    events.mark_changed([new_ticket.id])
     db.session.commit()
 
     if ticket_type == 'projeto' and stages:
@@ -232,6 +316,10 @@ def create_ticket(title, urgency, sector, description, user_email, attachments=N
                 db.session.add(att)
             db.session.commit()
 
+    if stages or attachments:
+        touch_ticket(new_ticket.id)
+        db.session.commit()
+
     return new_ticket
 def update_ticket_admin(ticket_id, user_email, new_status=None, new_assignee=None):
     """Atualiza o status e/ou o responsável do ticket, criando logs de interação."""
@@ -254,6 +342,73 @@ def update_ticket_admin(ticket_id, user_email, new_status=None, new_assignee=Non
     db.session.commit()
     return True
 
+BULK_CHUNK_SIZE = 500
+
+def bulk_update_tickets(ticket_ids, user_email, new_status=None, new_assignee=None):
+    """Altera status e/ou responsável de vários chamados em uma única transação.
+
+    As alterações são feitas com UPDATEs por conjunto e as interações de auditoria
+    são inseridas em lote. Retorna {ticket_id: 'updated' | 'unchanged' | 'not_found'}.
+    """
+    ticket_ids = list(dict.fromkeys(int(t) for t in ticket_ids))
+    results = {ticket_id: 'not_found' for ticket_id in ticket_ids}
+    if not ticket_ids or (not new_status and new_assignee is None):
+        return results
+
+    assignee_value = new_assignee if new_assignee else None
+    timestamp = datetime.utcnow()
+    tickets = {}
+    interactions = []
+    updated_ids = set()
+
+    for start in range(0, len(ticket_ids), BULK_CHUNK_SIZE):
+        chunk = ticket_ids[start:start + BULK_CHUNK_SIZE]
+        rows = db.session.query(
+            Ticket.id, Ticket.status, Ticket.assigned_user_email, Ticket.user_email, Ticket.created_at
+        ).filter(Ticket.id.in_(chunk)).all()
+
+        status_ids = []
+        assignee_ids = []
+        for row in rows:
+            tickets[row.id] = row
+            results[row.id] = 'unchanged'
+            if new_status and row.status != new_status:
+                status_ids.append(row.id)
+                interactions.append({
+                    'ticket_id': row.id, 'user_email': user_email, 'timestamp': timestamp,
+                    'action_type': 'status_change',
+                    'interaction_data': {'old_status': row.status, 'new_status': new_status},
+                })
+            if new_assignee is not None and row.assigned_user_email != assignee_value:
+                assignee_ids.append(row.id)
+                interactions.append({
+                    'ticket_id': row.id, 'user_email': user_email, 'timestamp': timestamp,
+                    'action_type': 'assign',
+                    'interaction_data': {'old_assignee': row.assigned_user_email, 'new_assignee': new_assignee},
+                })
+
+        if status_ids:
+            Ticket.query.filter(Ticket.id.in_(status_ids)).update(
+                {Ticket.status: new_status, Ticket.version: Ticket.version + 1}, synchronize_session=False
+            )
+        if assignee_ids:
+            Ticket.query.filter(Ticket.id.in_(assignee_ids)).update(
+                {Ticket.assigned_user_email: assignee_value, Ticket.version: Ticket.version + 1},
+                synchronize_session=False
+            )
+        for ticket_id in set(status_ids) | set(assignee_ids):
+            results[ticket_id] = 'updated'
+        updated_ids.update(status_ids, assignee_ids)
+        events.mark_changed(set(status_ids) | set(assignee_ids))
+
+    if interactions:
+        db.session.execute(insert(Interaction), interactions)
+        sla_service.record_bulk_interactions(tickets, interactions)
+        ticket_summary.refresh_summaries(sorted(updated_ids))
+
+    db.session.commit()
+    return results
+
 def update_interaction_status(interaction_id, new_status, user_email):
     """Atualiza o status de uma interação de validação."""
     interaction = Interaction.query.get(interaction_id)
@@ -263,6 +418,7 @@ def update_interaction_status(interaction_id, new_status, user_email):
     old_status = interaction.interaction_data.get('validation_status', 'pending')
     interaction.interaction_data['validation_status'] = new_status
     flag_modified(interaction, "interaction_data")
+    validation_service.set_status(interaction, new_status, user_email)
     
     # Cria uma interação filha para registrar a mudança manual
     add_interaction(
@@ -280,6 +436,7 @@ def update_project_stage_status(stage_id, new_status):
     stage = ProjectStage.query.get(stage_id)
     if stage:
         stage.status = new_status
+        touch_ticket(stage.ticket_id)
         db.session.commit()
         return True
     return False
@@ -303,12 +460,14 @@ def add_project_stage(ticket_id, name, deadline, files=None):
         deadline=deadline_obj
     )
     db.session.add(new_stage)
+    touch_ticket(ticket_id)
     db.session.commit()
     
     if files:
         attachment_objects = _save_attachments(files, ticket_id=ticket.id, project_stage_id=new_stage.id)
         for att in attachment_objects:
             db.session.add(att)
+        touch_ticket(ticket_id)
         db.session.commit()
 
     return new_stage
@@ -331,6 +490,7 @@ def update_project_stage(stage_id, name, deadline, files=None):
             for att in attachment_objects:
                 db.session.add(att)
 
+        touch_ticket(stage.ticket_id)
         db.session.commit()
         return True
     return False
@@ -340,6 +500,7 @@ def delete_project_stage(stage_id):
     stage = ProjectStage.query.get(stage_id)
     if stage:
         Interaction.query.filter_by(project_stage_id=stage_id).update({"project_stage_id": None})
+        ValidationRequest.query.filter_by(project_stage_id=stage_id).update({"project_stage_id": None})
         
         for attachment in stage.attachments:
             if os.path.exists(attachment.filepath):
@@ -349,6 +510,7 @@ def delete_project_stage(stage_id):
         db.session.commit()
 
         db.session.delete(stage)
+        touch_ticket(stage.ticket_id)
         db.session.commit()
         return True
     return False
@@ -357,9 +519,16 @@ def delete_attachment(attachment_id):
     """Exclui um anexo."""
     attachment = Attachment.query.get(attachment_id)
     if attachment:
+        ticket_id = attachment.ticket_id
+        if ticket_id is None and attachment.interaction:
+            ticket_id = attachment.interaction.ticket_id
+        if ticket_id is None and attachment.project_stage:
+            ticket_id = attachment.project_stage.ticket_id
         if os.path.exists(attachment.filepath):
             os.remove(attachment.filepath)
         db.session.delete(attachment)
+        if ticket_id is not None:
+            touch_ticket(ticket_id)
         db.session.commit()
         return True
     return False
\ No newline at end of file
@@ -0,0 +1,91 @@
+"""Colunas de resumo desnormalizadas em Ticket.
+
+`last_activity_at`, `interaction_count`, `pending_validation_count`,
+`stages_total` e `stages_done` repetem fatos das tabelas relacionadas para que a
+lista de chamados possa ordenar e filtrar por eles com índices, sem carregar
+etapas e interações de cada chamado. São recalculadas por subconsultas
+correlacionadas no mesmo UPDATE que incrementa `Ticket.version`
+(`ticket_service.touch_ticket`), ou seja, na mesma transação de toda alteração.
+
+`flask ticket-summary-check` compara os valores gravados com os calculados e
+`flask ticket-summary-repair` os recalcula (carga inicial ou reparo).
+"""
+from sqlalchemy import select, func, update, or_
+from models.ticket import db, Ticket, Interaction, ProjectStage, ValidationRequest
+
+STAGE_DONE_STATUS = 'Finalizado'
+VALIDATION_PENDING = 'pending'
+
+SUMMARY_COLUMNS = ['last_activity_at', 'interaction_count', 'pending_validation_count',
+                   'stages_total', 'stages_done']
+
+
+def summary_values():
+    """Expressões que calculam cada coluna de resumo para a linha de Ticket corrente."""
+    interactions = select(func.count(Interaction.id)).where(Interaction.ticket_id == Ticket.id)
+    last_interaction = select(func.max(Interaction.timestamp)).where(Interaction.ticket_id == Ticket.id)
+    pending = select(func.count(ValidationRequest.id)).where(
+        ValidationRequest.ticket_id == Ticket.id, ValidationRequest.status == VALIDATION_PENDING
+    )
+    stages = select(func.count(ProjectStage.id)).where(ProjectStage.ticket_id == Ticket.id)
+    stages_done = stages.where(ProjectStage.status == STAGE_DONE_STATUS)
+    return {
+        Ticket.last_activity_at: func.coalesce(last_interaction.scalar_subquery(), Ticket.created_at),
+        Ticket.interaction_count: interactions.scalar_subquery(),
+        Ticket.pending_validation_count: pending.scalar_subquery(),
+        Ticket.stages_total: stages.scalar_subquery(),
+        Ticket.stages_done: stages_done.scalar_subquery(),
+    }
+
+
+def refresh_summaries(ticket_ids):
+    """Recalcula o resumo dos chamados informados (sem commit)."""
+    ticket_ids = list(ticket_ids)
+    for start in range(0, len(ticket_ids), 500):
+        db.session.execute(
+            update(Ticket).where(Ticket.id.in_(ticket_ids[start:start + 500])).values(summary_values()),
+            execution_options={'synchronize_session': False}
+        )
+
+
+def _ticket_id_batches(batch_size):
+    last_id = 0
+    while True:
+        ids = db.session.execute(
+            select(Ticket.id).where(Ticket.id > last_id).order_by(Ticket.id).limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            return
+        yield ids
+        last_id = ids[-1]
+
+
+def repair_summaries(batch_size=500):
+    """Recalcula o resumo de todos os chamados, um lote por transação. Retorna quantos."""
+    count = 0
+    for ids in _ticket_id_batches(batch_size):
+        refresh_summaries(ids)
+        db.session.commit()
+        count += len(ids)
+    return count
+
+
+def find_inconsistent_summaries(batch_size=500):
+    """Lista (ticket_id, coluna, valor gravado, valor calculado) das colunas divergentes."""
+    expected = {column.key: expression.label(f'expected_{column.key}')
+                for column, expression in summary_values().items()}
+    stored = [getattr(Ticket, name) for name in SUMMARY_COLUMNS]
+
+    problems = []
+    for ids in _ticket_id_batches(batch_size):
+        rows = db.session.execute(
+            select(Ticket.id, *stored, *expected.values())
+            .where(Ticket.id.in_(ids))
+            .where(or_(*[getattr(Ticket, name).is_distinct_from(expected[name]) for name in SUMMARY_COLUMNS]))
+        ).all()
+        for row in rows:
+            for name in SUMMARY_COLUMNS:
+                stored_value, expected_value = getattr(row, name), getattr(row, f'expected_{name}')
+                if stored_value != expected_value:
+                    problems.append((row.id, name, stored_value, expected_value))
+    return problems
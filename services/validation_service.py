@@ -0,0 +1,121 @@
+"""Pedidos de validação em tabela própria (ValidationRequest).
+
+O estado de um pedido continua gravado em `interaction_data['validation_status']`
+(é o que a tela do chamado exibe), mas toda alteração feita pelo ticket_service
+também atualiza a linha correspondente de ValidationRequest, na mesma transação.
+Com isso a fila "aguardando minha validação" e os pedidos vencidos são lidos por
+faixa dos índices (approver_email, status, deadline) e (status, deadline), sem
+carregar e inspecionar as interações.
+
+`flask validation-backfill` cria as linhas dos pedidos anteriores à tabela.
+"""
+from datetime import datetime
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload
+from models.ticket import db, Ticket, Interaction, ValidationRequest
+
+PENDING = 'pending'
+QUEUE_LIMIT = 200
+
+
+def open_request(interaction, approver_email=None):
+    """Registra o pedido de uma interação 'request_validation' recém-criada (sem commit)."""
+    if approver_email is None:
+        approver_email = db.session.execute(
+            select(Ticket.user_email).where(Ticket.id == interaction.ticket_id)
+        ).scalar()
+    validation = ValidationRequest(
+        interaction=interaction,
+        ticket_id=interaction.ticket_id,
+        project_stage_id=interaction.project_stage_id,
+        requester_email=interaction.user_email,
+        approver_email=approver_email,
+        status=(interaction.interaction_data or {}).get('validation_status', PENDING),
+        deadline=interaction.deadline,
+        created_at=interaction.timestamp or datetime.utcnow(),
+    )
+    db.session.add(validation)
+    return validation
+
+
+def set_status(interaction, status, user_email):
+    """Atualiza o estado do pedido ligado à interação (sem commit)."""
+    validation = interaction.validation_request or open_request(interaction)
+    validation.status = status
+    if status == PENDING:
+        validation.resolved_at = None
+        validation.resolved_by = None
+    else:
+        validation.resolved_at = datetime.utcnow()
+        validation.resolved_by = user_email
+    return validation
+
+
+def _queue_query():
+    return (ValidationRequest.query
+            .options(joinedload(ValidationRequest.ticket).load_only(Ticket.id, Ticket.title, Ticket.status),
+                     joinedload(ValidationRequest.stage)))
+
+
+def get_pending_for_approver(approver_email, limit=QUEUE_LIMIT):
+    """Pedidos pendentes que aguardam a validação do usuário, prazos mais próximos primeiro.
+
+    Os pedidos sem prazo vêm por último, numa segunda consulta: as duas seguem a
+    ordem do índice (approver_email, status, deadline), sem ordenação à parte.
+    """
+    query = _queue_query().filter(ValidationRequest.approver_email == approver_email,
+                                  ValidationRequest.status == PENDING)
+    pending = (query.filter(ValidationRequest.deadline.isnot(None))
+               .order_by(ValidationRequest.deadline, ValidationRequest.id)
+               .limit(limit).all())
+    if len(pending) < limit:
+        pending += (query.filter(ValidationRequest.deadline.is_(None))
+                    .order_by(ValidationRequest.id)
+                    .limit(limit - len(pending)).all())
+    return pending
+
+
+def get_pending_requested_by(requester_email, limit=QUEUE_LIMIT):
+    """Pedidos feitos pelo usuário que ainda aguardam resposta, mais antigos primeiro."""
+    return (_queue_query()
+            .filter(ValidationRequest.requester_email == requester_email, ValidationRequest.status == PENDING)
+            .order_by(ValidationRequest.created_at, ValidationRequest.id)
+            .limit(limit).all())
+
+
+def get_overdue(now=None, approver_email=None, limit=QUEUE_LIMIT):
+    """Pedidos pendentes com prazo vencido (faixa de índice status = pending, deadline < agora)."""
+    query = _queue_query().filter(ValidationRequest.status == PENDING,
+                                  ValidationRequest.deadline < (now or datetime.utcnow()))
+    if approver_email is not None:
+        query = query.filter(ValidationRequest.approver_email == approver_email)
+    return query.order_by(ValidationRequest.deadline, ValidationRequest.id).limit(limit).all()
+
+
+def backfill_validation_requests(batch_size=500):
+    """Cria as linhas de ValidationRequest que faltam a partir das interações; retorna quantas."""
+    count = 0
+    last_id = 0
+    while True:
+        interactions = (Interaction.query
+                        .options(joinedload(Interaction.validation_request), joinedload(Interaction.children))
+                        .filter(Interaction.action_type == 'request_validation', Interaction.id > last_id)
+                        .order_by(Interaction.id)
+                        .limit(batch_size).all())
+        if not interactions:
+            return count
+        owners = dict(db.session.execute(
+            select(Ticket.id, Ticket.user_email).where(Ticket.id.in_({i.ticket_id for i in interactions}))
+        ).all())
+        for interaction in interactions:
+            if interaction.validation_request is not None:
+                continue
+            validation = open_request(interaction, owners.get(interaction.ticket_id))
+            if validation.status != PENDING:
+                answers = sorted(interaction.children, key=lambda child: (child.timestamp, child.id))
+                if answers:
+                    validation.resolved_at = answers[-1].timestamp
+                    validation.resolved_by = answers[-1].user_email
+            count += 1
+        last_id = interactions[-1].id
+        db.session.commit()
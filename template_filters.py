@@ -0,0 +1,56 @@
+"""Filtros de template para textos livres (interações, descrições, IDs externos).
+
+O HTML gerado por `autolink`/`nl2br` fica em um LRU limitado, indexado pelo hash do
+texto: textos de interações não mudam depois de gravados, então abrir um chamado
+com centenas de interações não refaz a linkificação a cada visualização. O
+tamanho do cache é configurável com TEMPLATE_FILTER_CACHE_SIZE.
+"""
+import os
+import re
+import hashlib
+from markupsafe import escape, Markup
+from cache import LRUCache
+
+URL_PATTERN = re.compile(r'((?:https?://|www\.)[^\s<]+[^<.,:;"\'\]\s])')
+NEWLINE_PATTERN = re.compile(r'\r\n|\r|\n')
+
+_rendered = LRUCache(int(os.getenv('TEMPLATE_FILTER_CACHE_SIZE', 4096)))
+
+
+def _cache_key(kind, value):
+    digest = hashlib.blake2b(value.encode('utf-8'), digest_size=16).digest()
+    return kind, isinstance(value, Markup), digest
+
+
+def _autolink(value):
+    # A substituição é feita sobre `str`: sobre um Markup o `re` junta os pedaços
+    # com Markup('').join e escaparia as próprias tags <a> e <br/> inseridas.
+    escaped = str(escape(value))
+    if 'http' not in escaped and 'www.' not in escaped:
+        return escaped
+    return URL_PATTERN.sub(r'<a href="\1" target="_blank">\1</a>', escaped)
+
+
+def _nl2br(value):
+    return Markup(NEWLINE_PATTERN.sub('<br/>', _autolink(value)))
+
+
+def autolink(value):
+    if not value:
+        return ''
+    value = value if isinstance(value, str) else str(value)
+    return _rendered.get_or_set(_cache_key('autolink', value), lambda: Markup(_autolink(value)))
+
+
+def nl2br(value):
+    if value is None:
+        return ''
+    value = value if isinstance(value, str) else str(value)
+    if not value:
+        return Markup('')
+    return _rendered.get_or_set(_cache_key('nl2br', value), lambda: _nl2br(value))
+
+
+def register_filters(app):
+    app.jinja_env.filters['nl2br'] = nl2br
+    app.jinja_env.filters['autolink'] = autolink